@@ -0,0 +1,507 @@
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import DrawUtils as DrawUtils
+import GameObjects as GameObjects
+import Grid as Grid
+import MathUtils as Math
+import ObjectPools as ObjectPools
+import PathFinding as PathFinding
+import ProjectileEngine as ProjectileEngine
+import Projectiles as Projectiles
+import Towers as Towers
+import UnitEngine as UnitEngine
+import Units as Units
+
+BENCHMARK_GRID_SIZES = [(16, 9), (64, 36), (256, 144)]
+
+
+def make_grid(cols, rows, tile_size=50, enter_tiles=None, exit_tiles=None):
+    return Grid.Grid((0, 0), (cols * tile_size, rows * tile_size), rows=rows, cols=cols, enter_tiles=enter_tiles, exit_tiles=exit_tiles)
+
+
+def time_call(func, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats
+
+
+def benchmark_pathfinding(sizes=None, reference_max_tiles=64*36):
+    # pseudo_dijkstra is O(V^2), above reference_max_tiles it is only run once (256x144 takes over a minute)
+    if sizes is None:
+        sizes = BENCHMARK_GRID_SIZES
+    print("pathfinding (enter tile -> all tiles)")
+    for cols, rows in sizes:
+        grid = make_grid(cols, rows)
+        tiles = grid.get_tiles_flatten_list()
+        enter_tile = grid.get_enter_tile()
+        neighbor_ids = grid.get_neighbor_ids()
+        blocked = grid.get_blocked_nodes()
+
+        reference_repeats = 5 if len(tiles) <= reference_max_tiles else 1
+        reference_time = time_call(lambda: Math.pseudo_dijkstra(tiles, enter_tile), reference_repeats)
+        engine_time = time_call(lambda: PathFinding.multi_source_shortest_paths(neighbor_ids, blocked, [enter_tile.get_node_id()]), 20)
+
+        print("  {}x{}: pseudo_dijkstra {:.3f} ms, bfs {:.3f} ms ({:.0f}x)".format(
+            cols, rows, reference_time * 1000, engine_time * 1000, reference_time / engine_time))
+
+
+def benchmark_path_repair(sizes=None, updates=200):
+    # Toggles random tiles on the exit distance field, incremental repair vs a full rebuild
+    if sizes is None:
+        sizes = BENCHMARK_GRID_SIZES
+    print("path cache update (one tile blocked / unblocked)")
+    rng = random.Random(0)
+    for cols, rows in sizes:
+        grid = make_grid(cols, rows)
+        neighbor_ids = grid.get_neighbor_ids()
+        blocked = grid.get_blocked_nodes()
+        target = len(neighbor_ids) - 1
+        field = PathFinding.DistanceField(neighbor_ids, blocked, [target])
+        nodes = [rng.randrange(target) for _ in range(updates)]
+
+        relaxed_counts = []
+        start = time.perf_counter()
+        for node in nodes + nodes:
+            blocked[node] = not blocked[node]
+            field.set_blocked(node, blocked[node])
+            relaxed_counts.append(field.relaxed_count)
+        repair_time = (time.perf_counter() - start) / len(relaxed_counts)
+        rebuild_time = time_call(lambda: PathFinding.distance_field(neighbor_ids, blocked, [target]), 10)
+
+        relaxed_counts.sort()
+        print("  {}x{} ({} nodes): rebuild {:.3f} ms, repair {:.3f} ms, relaxed nodes median {} / max {}".format(
+            cols, rows, len(neighbor_ids), rebuild_time * 1000, repair_time * 1000,
+            relaxed_counts[len(relaxed_counts) // 2], relaxed_counts[-1]))
+
+
+def scan_is_occupied(tile):
+    # Tile.is_occupied before per node occupancy arrays, kept as reference
+    for game_obj in tile.debug_get_objects():
+        if game_obj.get_type() == GameObjects.ObjectType.TOWER:
+            return True
+    return False
+
+
+def scan_get_units(tile):
+    return [x for x in tile.debug_get_objects() if x.get_type() == GameObjects.ObjectType.UNIT]
+
+
+def benchmark_occupancy(cols=16, rows=9, repeats=200):
+    print("tile occupancy queries ({}x{}, a tower on every 4th tile, 2 units on every 3rd)".format(cols, rows))
+    grid = make_grid(cols, rows)
+    tiles = grid.get_tiles_flatten_list()
+    for i, tile in enumerate(tiles):
+        if i % 4 == 1 and grid.can_place_tower(tile):
+            tile.add_object(Towers.MazeTower())
+        if i % 3 == 0:
+            for _ in range(2):
+                tile.add_object(Units.Unit())
+
+    query_count = len(tiles) * repeats
+    for name, func in [("is_occupied", lambda t: t.is_occupied()), ("scan is_occupied", scan_is_occupied),
+                       ("get_units", lambda t: t.get_units()), ("scan get_units", scan_get_units)]:
+        elapsed = time_call(lambda: [func(tile) for tile in tiles], repeats) * repeats
+        print("  {}: {:.2f} M queries/s".format(name, query_count / elapsed / 1e6))
+
+
+def scan_tiles_in_range(grid, tile, distance):
+    # Brute force geometry, every tile center within distance of the tile center
+    center = tile.get_center_location()
+    return [t for t in grid.get_tiles_flatten_list() if Math.distance(t.get_center_location(), center) <= distance]
+
+
+def benchmark_range_stencils(repeats=20):
+    # Stencils against brute force geometry, tests/test_grid.py checks they give the same tiles
+    print("tiles in range")
+    configs = [((16, 9), (1008, 648), Towers.ShootTower(location=(0, 0)).get_attack_range()),
+               ((16, 9), (800, 450), 150), ((16, 9), (1600, 900), 100), ((64, 36), (3200, 1800), 275.5)]
+    for (cols, rows), size, distance in configs:
+        grid = Grid.Grid((17, 9), size, rows=rows, cols=cols)
+        tiles = grid.get_tiles_flatten_list()
+        stencil_time = time_call(lambda: [t.get_tiles_in_range(distance) for t in tiles], repeats) / len(tiles)
+        scan_time = time_call(lambda: [scan_tiles_in_range(grid, t, distance) for t in tiles], 1) / len(tiles)
+        print("  {}x{} tile {:.1f}x{:.1f} range {}: brute force {:.1f} us, stencil {:.1f} us".format(
+            cols, rows, size[0] / cols, size[1] / rows, distance, scan_time * 1e6, stencil_time * 1e6))
+
+
+def scan_closest_tile(grid, loc, b_within_grid=True):
+    # Grid.get_closest_tile before the arithmetic lookup: closest tile center, first tile wins ties
+    x, y = loc
+    if b_within_grid and not grid.in_bounds(loc):
+        return None
+    closest_tile = None
+    lowest_dist = None
+    for tile in grid.get_tiles_flatten_list():
+        center = tile.get_center_location()
+        dist = (center[0]-x)*(center[0]-x) + (center[1]-y)*(center[1]-y)
+        if lowest_dist is None or dist < lowest_dist:
+            closest_tile = tile
+            lowest_dist = dist
+    return closest_tile
+
+
+def benchmark_closest_tile(point_count=2000, scan_count=100):
+    # Grid.get_closest_tile against the full scan on the game's grid geometry, tests/test_grid.py checks they agree
+    vm = DrawUtils.VisualManager()
+    grid = Grid.Grid(vm.get_location(.2, .1), vm.get_size(.7, .8))
+    rows, cols = grid.get_dimensions()
+    (x1, y1), (x2, y2) = grid.get_grid_bounds()
+    print("closest tile ({}x{} grid at {}, tile size {})".format(cols, rows, grid.get_location(), grid.get_tile_size()))
+    rng = random.Random(0)
+    points = [(rng.uniform(x1, x2), rng.uniform(y1, y2)) for _ in range(point_count)]
+    scan_time = time_call(lambda: [scan_closest_tile(grid, loc) for loc in points[:scan_count]], 1) / scan_count
+    lookup_time = time_call(lambda: [grid.get_closest_tile(loc) for loc in points], 1) / point_count
+    print("  scan {:.1f} us, lookup {:.2f} us".format(scan_time * 1e6, lookup_time * 1e6))
+
+
+def spawn_wave(grid, unit_count, make_unit, seed=0):
+    rng = random.Random(seed)
+    tiles = [t for t in grid.get_tiles_flatten_list() if not t.is_occupied() and not t.is_exit_tile()]
+    units = []
+    for _ in range(unit_count):
+        unit = make_unit(death_event=remove_from_tile, end_tile_event=remove_from_tile)
+        rng.choice(tiles).add_object(unit)
+        unit.initialize()
+        units.append(unit)
+    return units
+
+
+def remove_from_tile(game_object, tile):
+    tile.remove_object(game_object)
+
+
+def benchmark_unit_batch(unit_counts=None, ticks=60, cols=64, rows=36):
+    if unit_counts is None:
+        unit_counts = [100, 1000, 5000]
+    print("unit movement ({}x{} grid, {} ticks)".format(cols, rows, ticks))
+    for unit_count in unit_counts:
+        grid = make_grid(cols, rows)
+        units = spawn_wave(grid, unit_count, Units.Unit)
+        unit_time = time_call(lambda: [u.gameplay_tick() for u in units], ticks)
+
+        grid = make_grid(cols, rows)
+        batch = UnitEngine.UnitBatch(grid)
+        spawn_wave(grid, unit_count, lambda **kwargs: UnitEngine.BatchedUnit(batch, **kwargs))
+        batch_time = time_call(batch.gameplay_tick, ticks)
+
+        print("  {} units: Unit.gameplay_tick {:.2f} ms/tick, UnitBatch {:.2f} ms/tick ({:.1f}x)".format(
+            unit_count, unit_time * 1000, batch_time * 1000, unit_time / batch_time))
+
+
+def benchmark_projectile_pool(projectile_count=5000, ticks=30, cols=64, rows=36):
+    # Slow projectiles so most of them stay alive, a unit on every 10th tile to hit
+    print("projectiles ({} simultaneous, {}x{} grid, {} ticks)".format(projectile_count, cols, rows, ticks))
+    rng = random.Random(0)
+    starts = [(rng.uniform(100, cols * 50 - 100), rng.uniform(100, rows * 50 - 100), rng.uniform(-1, 1), rng.uniform(-1, 1)) for _ in range(projectile_count)]
+
+    def setup_grid():
+        grid = make_grid(cols, rows)
+        for tile in grid.get_tiles_flatten_list()[::10]:
+            tile.add_object(Units.Unit(health=10**9))
+        return grid
+
+    grid = setup_grid()
+    projectiles = []
+    for x, y, dx, dy in starts:
+        proj = Projectiles.ProjectileBase(speed=2, location=(x, y), visible=True, tile=grid.get_tile_containing((x, y)), damage=1, destroy_event=projectiles.remove)
+        proj.initialize()
+        proj.set_direction([dx, dy])
+        projectiles.append(proj)
+    object_time = time_call(lambda: [p.gameplay_tick() for p in list(projectiles)], ticks)
+    object_alive = len(projectiles)
+
+    pool = ProjectileEngine.ProjectilePool(setup_grid())
+    for x, y, dx, dy in starts:
+        pool.spawn((x, y), speed=2, damage=1, direction=(dx, dy))
+    pool_time = time_call(pool.gameplay_tick, ticks)
+
+    print("  ProjectileBase {:.2f} ms/tick ({} left), ProjectilePool {:.2f} ms/tick ({} left) ({:.1f}x)".format(
+        object_time * 1000, object_alive, pool_time * 1000, pool.get_projectile_count(), object_time / pool_time))
+
+
+class CachedCenterUnit(Units.Unit):
+    # Unit that also stores its center, kept in sync on every move like GameObject used to. Only here so
+    # benchmark_object_memory can show what the cache costs against deriving the center from _location.
+    __slots__ = ("_center",)
+
+    def __init__(self, *args, **kwargs):
+        self._center = None
+        Units.Unit.__init__(self, *args, **kwargs)
+        if self._location is not None:
+            self._center = self._get_center_of(self._location)
+
+    def get_center_location(self):
+        if self._center is None:
+            return Units.Unit.get_center_location(self)
+        return self._center
+
+    def set_location(self, new_location):
+        self._location = new_location
+        self._center = None if new_location is None else self._get_center_of(new_location)
+
+    def set_center_location(self, center):
+        Units.Unit.set_center_location(self, center)
+        self._center = center
+
+
+def benchmark_object_memory(unit_count=1000, ticks=60, cols=64, rows=36):
+    # tracemalloc: memory held by a wave of units and the transient allocations (peak above steady state) per tick, for
+    # Unit and for a Unit that caches its center
+    print("object memory ({} units, {}x{} grid, {} ticks)".format(unit_count, cols, rows, ticks))
+    for name, unit_type in [("Unit", Units.Unit), ("cached center", CachedCenterUnit)]:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        grid = make_grid(cols, rows)
+        grid_bytes = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        units = spawn_wave(grid, unit_count, unit_type)
+        wave_bytes = tracemalloc.get_traced_memory()[0] - before
+
+        transient_peaks = []
+        for _ in range(ticks):
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            for unit in units:
+                unit.gameplay_tick()
+            transient_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        held_bytes = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        unit_time = time_call(lambda: [u.gameplay_tick() for u in units], ticks)
+        transient_peaks.sort()
+        print("  {}: grid {:.0f} bytes/tile, wave {:.0f} bytes/unit ({:.0f} after {} ticks), transient peak per tick median {:.0f} bytes, {:.2f} ms/tick".format(
+            name, grid_bytes / (cols * rows), wave_bytes / unit_count, held_bytes / unit_count, ticks, transient_peaks[len(transient_peaks) // 2], unit_time * 1000))
+
+
+def benchmark_object_pools(unit_count=1000, waves=40, cols=64, rows=36):
+    # Spawn bursts of units onto the grid and release them again, new objects vs ObjectPools (optionally with the grid
+    # gc.freeze()-ed). GC pauses are timed with gc.callbacks.
+    print("object pools ({} unit waves, {} waves, {}x{} grid)".format(unit_count, waves, cols, rows))
+    pauses = []
+    pause_start = [0.0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            pause_start[0] = time.perf_counter()
+        else:
+            pauses.append((info["generation"], time.perf_counter() - pause_start[0]))
+
+    for name, pooled, freeze in [("new objects", False, False), ("ObjectPools", True, False), ("ObjectPools + gc.freeze", True, True)]:
+        gc.collect()
+        grid = make_grid(cols, rows)
+        if freeze:
+            gc.collect()
+            gc.freeze()
+        pools = ObjectPools.ObjectPools() if pooled else None
+        rng = random.Random(0)
+        tiles = [t for t in grid.get_tiles_flatten_list() if not t.is_exit_tile()]
+        pauses.clear()
+        gc.callbacks.append(on_gc)
+
+        start = time.perf_counter()
+        for _ in range(waves):
+            units = []
+            for _ in range(unit_count):
+                if pools is None:
+                    unit = Units.Unit(health=20, speed=10.0, visible=True, death_event=remove_from_tile, end_tile_event=remove_from_tile)
+                else:
+                    unit = pools.acquire(Units.Unit, health=20, speed=10.0, visible=True, death_event=remove_from_tile, end_tile_event=remove_from_tile)
+                rng.choice(tiles).add_object(unit)
+                unit.initialize()
+                units.append(unit)
+            for unit in units:
+                unit.take_damage(20)
+                if pools is not None:
+                    pools.release(unit)
+            if pools is not None:
+                pools.recycle()
+        elapsed = time.perf_counter() - start
+
+        gc.callbacks.remove(on_gc)
+        if freeze:
+            gc.unfreeze()
+        total_pause = sum(p for _, p in pauses)
+        max_pause = max([p for _, p in pauses] or [0.0])
+        print("  {}: {:.2f} ms/wave, {} collections ({} gen 2), gc pause total {:.2f} ms, max {:.3f} ms".format(
+            name, elapsed / waves * 1000, len(pauses), len([g for g, _ in pauses if g == 2]), total_pause * 1000, max_pause * 1000))
+        if pools is not None:
+            print("    " + ", ".join("{}={}".format(k, v) for k, v in pools.get_stats()["Unit"].items()))
+
+
+def benchmark_shared_paths(spawns=1000, sizes=None):
+    # Grid.get_shortest_path for a wave of units spawning on enter_tile: copying the path per unit vs the shared Path
+    if sizes is None:
+        sizes = BENCHMARK_GRID_SIZES[:2]
+    print("shared paths ({} spawns on enter tile)".format(spawns))
+    for cols, rows in sizes:
+        grid = make_grid(cols, rows)
+        enter_id = grid.get_enter_tile().get_node_id()
+        exit_id = grid.get_exit_tile().get_node_id()
+        tiles = grid.get_tiles_flatten_list()
+        _, next_nodes = PathFinding.distance_field(grid.get_neighbor_ids(), grid.get_blocked_nodes(), [exit_id])
+
+        def copy_path():
+            return [tiles[n] for n in PathFinding.follow_next_nodes(next_nodes, enter_id, exit_id)]
+
+        tracemalloc.start()
+        copies = [copy_path() for _ in range(spawns)]
+        copy_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del copies
+        tracemalloc.start()
+        shared = [grid.get_shortest_path() for _ in range(spawns)]
+        shared_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        path = shared[0]
+        copy_time = time_call(copy_path, spawns)
+        shared_time = time_call(grid.get_shortest_path, spawns)
+
+        print("  {}x{} (path length {}): copied {:.2f} us / {:.0f} bytes per spawn, shared {:.2f} us / {:.0f} bytes per spawn".format(
+            cols, rows, len(path), copy_time * 1e6, copy_bytes / spawns, shared_time * 1e6, shared_bytes / spawns))
+
+
+def serpentine_blocked(cols, rows):
+    # Every other column is a wall with a gap alternating between the bottom and top row, the longest path a grid allows
+    blocked = bytearray(cols * rows)
+    for col in range(1, cols - 1, 2):
+        gap = rows - 1 if col % 4 == 1 else 0
+        for row in range(rows):
+            if row != gap:
+                blocked[col * rows + row] = 1
+    return blocked
+
+
+def benchmark_flow_field(unit_count=10000, ticks=20, sizes=None, updates=100):
+    # distance_field / flow_field with 4 exits and the incremental DistanceField repair, on random and serpentine mazes
+    # (tests/test_path_finding.py checks them against one field per exit and a rebuild). Then unit_count units reading a
+    # 4 exit field.
+    if sizes is None:
+        sizes = BENCHMARK_GRID_SIZES
+    print("flow field (4 exits, {} units)".format(unit_count))
+    rng = random.Random(0)
+    for cols, rows in sizes:
+        exit_tiles = [(-1, -1), (-1, 0), (0, -1), (cols // 2, rows // 2)]
+        grid = make_grid(cols, rows, exit_tiles=exit_tiles)
+        neighbor_ids = grid.get_neighbor_ids()
+        targets = [tile.get_node_id() for tile in grid.get_exit_tiles()]
+        repeats = 20 if cols * rows <= 64 * 36 else 3
+
+        for maze, blocked in [("random", bytearray(rng.random() < 0.25 for _ in range(cols * rows))), ("serpentine", serpentine_blocked(cols, rows))]:
+            for target in targets:
+                blocked[target] = 0
+
+            # Towers placed and removed on open tiles, repaired in place
+            field = PathFinding.DistanceField(neighbor_ids, blocked, targets)
+            open_nodes = [n for n in range(cols * rows) if not blocked[n] and n not in targets]
+            nodes = rng.sample(open_nodes, min(updates, len(open_nodes)))
+            start = time.perf_counter()
+            for node in nodes + nodes:
+                blocked[node] = not blocked[node]
+                field.set_blocked(node, blocked[node])
+            repair_time = (time.perf_counter() - start) / (2 * len(nodes))
+
+            rebuild_time = time_call(lambda: PathFinding.distance_field(neighbor_ids, blocked, targets), repeats)
+            flow_time = time_call(lambda: PathFinding.flow_field(neighbor_ids, blocked, cols, rows, targets), repeats)
+            print("  {}x{} {}: distance_field {:.2f} ms, flow_field {:.2f} ms, DistanceField repair {:.3f} ms".format(
+                cols, rows, maze, rebuild_time * 1000, flow_time * 1000, repair_time * 1000))
+
+        batch = UnitEngine.UnitBatch(grid)
+        spawn_wave(grid, unit_count, lambda **kwargs: UnitEngine.BatchedUnit(batch, **kwargs))
+        batch_time = time_call(batch.gameplay_tick, ticks)
+        units = spawn_wave(make_grid(cols, rows, exit_tiles=exit_tiles), unit_count, Units.Unit)
+        unit_time = time_call(lambda: [u.gameplay_tick() for u in units], ticks)
+
+        # A tower placed mid wave repairs the field once, every unit reads the new one on its next tile
+        tile = next(t for t in grid.get_placeable_tiles() if t.get_node_id() not in targets)
+        start = time.perf_counter()
+        tile.add_object(Towers.MazeTower())
+        update_time = time.perf_counter() - start
+        print("    {} units: UnitBatch {:.2f} ms/tick, Unit.gameplay_tick {:.2f} ms/tick, tower placed: field repaired in {:.2f} ms".format(
+            unit_count, batch_time * 1000, unit_time * 1000, update_time * 1000))
+
+
+def benchmark_weighted_paths(sizes=None, pairs=20, updates=100):
+    # Weighted field / A* against the unweighted BFS field on random 25% mazes, tests/test_path_finding.py checks they
+    # agree
+    if sizes is None:
+        sizes = BENCHMARK_GRID_SIZES
+    print("weighted paths (costs 1 and random 1-5)")
+    rng = random.Random(0)
+    for cols, rows in sizes:
+        grid = make_grid(cols, rows)
+        neighbor_ids = grid.get_neighbor_ids()
+        node_count = cols * rows
+        source = grid.get_enter_tile().get_node_id()
+        target = grid.get_exit_tile().get_node_id()
+        blocked = bytearray(rng.random() < 0.25 for _ in range(node_count))
+        for node in (source, target) + neighbor_ids[source] + neighbor_ids[target]:
+            blocked[node] = 0
+        random_costs = [rng.randint(1, 5) for _ in range(node_count)]
+
+        # enter -> exit is the worst case for the heuristic (every node between the corners is as promising), random
+        # pairs (within 20 columns / rows of each other) are the typical point to point query
+        repeats = 20 if node_count <= 64 * 36 else 3
+        open_nodes = [n for n in range(node_count) if not blocked[n]]
+        near_pairs = []
+        while len(near_pairs) < pairs:
+            a, b = rng.choice(open_nodes), rng.choice(open_nodes)
+            if abs(a // rows - b // rows) + abs(a % rows - b % rows) <= 20:
+                near_pairs.append((a, b))
+        bfs_time = time_call(lambda: PathFinding.distance_field(neighbor_ids, blocked, [source]), repeats)
+        dijkstra_time = time_call(lambda: PathFinding.weighted_distance_field(neighbor_ids, blocked, random_costs, [source]), repeats)
+        a_star_time = time_call(lambda: PathFinding.a_star(neighbor_ids, blocked, random_costs, source, target, rows), repeats)
+        pairs_dijkstra_time = time_call(lambda: [PathFinding.weighted_distance_field(neighbor_ids, blocked, random_costs, [b]) for a, b in near_pairs], 1) / pairs
+        pairs_a_star_time = time_call(lambda: [PathFinding.a_star(neighbor_ids, blocked, random_costs, a, b, rows) for a, b in near_pairs], 1) / pairs
+        print("  {}x{}: bfs field {:.3f} ms, weighted field {:.3f} ms, A* enter -> exit {:.3f} ms, random pairs weighted field {:.3f} ms / A* {:.3f} ms".format(
+            cols, rows, bfs_time * 1000, dijkstra_time * 1000, a_star_time * 1000, pairs_dijkstra_time * 1000, pairs_a_star_time * 1000))
+
+        # Weighted field (towards the enter tile, the exit corner can be walled into a small pocket) repaired in place
+        # while towers are placed and then removed
+        field = PathFinding.DistanceField(neighbor_ids, blocked, [source], random_costs)
+        nodes = rng.sample([n for n in open_nodes if n != source], min(updates, len(open_nodes) - 1))
+        repair_time = 0
+        for pass_blocked in (1, 0):
+            start = time.perf_counter()
+            for node in nodes:
+                blocked[node] = pass_blocked
+                field.set_blocked(node, pass_blocked)
+            repair_time += time.perf_counter() - start
+        rebuild_time = time_call(lambda: PathFinding.weighted_distance_field(neighbor_ids, blocked, random_costs, [source]), repeats)
+        print("    weighted field: rebuild {:.3f} ms, repair {:.3f} ms".format(rebuild_time * 1000, repair_time / (2 * len(nodes)) * 1000))
+
+
+BENCHMARKS = {
+    "pathfinding": benchmark_pathfinding,
+    "path_repair": benchmark_path_repair,
+    "occupancy": benchmark_occupancy,
+    "range_stencils": benchmark_range_stencils,
+    "closest_tile": benchmark_closest_tile,
+    "unit_batch": benchmark_unit_batch,
+    "projectile_pool": benchmark_projectile_pool,
+    "object_memory": benchmark_object_memory,
+    "object_pools": benchmark_object_pools,
+    "shared_paths": benchmark_shared_paths,
+    "flow_field": benchmark_flow_field,
+    "weighted_paths": benchmark_weighted_paths,
+}
+
+
+def main(names=None):
+    if not names:
+        names = BENCHMARKS.keys()
+    for name in names:
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
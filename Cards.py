@@ -8,7 +8,8 @@ from DrawUtils import Shapes
 
 
 class Deck:
-    def __init__(self):
+    def __init__(self, rng=random):
+        self._rng = rng  # GameStuff.rng for reproducible games
         self._base_card_list = []
         self._max_cards = 30
 
@@ -18,7 +19,7 @@ class Deck:
         return self._current_card_list.pop()
 
     def shuffle_cards(self):
-        random.shuffle(self._current_card_list)
+        self._rng.shuffle(self._current_card_list)
 
 
 class CardIDs(Enum):
@@ -27,11 +28,12 @@ class CardIDs(Enum):
 
 
 class BaseCard(GameObjects.GameObject):
+    __slots__ = ("_start_loc", "_held")
+
     def __init__(self, location=None, visible=False):
-        GameObjects.GameObject.__init__(self, location, visible)
-        self._shape = Shapes.RECT
-        self._size = (Defaults.DEFAULT_OBJ_SIZE*3, Defaults.DEFAULT_OBJ_SIZE*4)
-        self._start_loc = location
+        GameObjects.GameObject.__init__(self, None, visible)
+        self.set_shape(Shapes.RECT, (Defaults.DEFAULT_OBJ_SIZE*3, Defaults.DEFAULT_OBJ_SIZE*4))
+        self.set_location(location)
         self._held = False
         self._object_type = GameObjects.ObjectType.CARD
 
@@ -49,18 +51,18 @@ class BaseCard(GameObjects.GameObject):
         self._held = True
 
     def set_location(self, loc, update_start=True):
-        self._location = loc
+        GameObjects.GameObject.set_location(self, loc)
         self._start_loc = loc
 
     def get_start_loc(self):
         return self._start_loc
 
     def click_release(self):
-        self._location = self._start_loc
+        GameObjects.GameObject.set_location(self, self._start_loc)
         self._held = False
 
     def visual_tick_held(self, held_loc):
-        self._location = (held_loc[0] - self._size[0]/2, held_loc[1] - self._size[1]/2)
+        self.set_center_location(held_loc)
 
     def get_tower_type(self):
         print("base card get_tower_type")
@@ -69,6 +71,8 @@ class BaseCard(GameObjects.GameObject):
 
 
 class MazeCard(BaseCard):
+    __slots__ = ()
+
     def __init__(self, location=None, visible=False):
         BaseCard.__init__(self, location=location, visible=visible)
         self._color = Towers.MazeTower.COLOR
@@ -78,6 +82,8 @@ class MazeCard(BaseCard):
 
 
 class StompCard(BaseCard):
+    __slots__ = ()
+
     def __init__(self, location=None, visible=False):
         BaseCard.__init__(self, location=location, visible=visible)
         self._color = Towers.StompTower.COLOR
@@ -87,6 +93,8 @@ class StompCard(BaseCard):
 
 
 class ShootCard(BaseCard):
+    __slots__ = ()
+
     def __init__(self, location=None, visible=False):
         BaseCard.__init__(self, location=location, visible=visible)
         self._color = Towers.ShootTower.COLOR
@@ -11,11 +11,32 @@ DEFAULT_GRID_COLS = 16
 DEFAULT_OBJ_SIZE = 25
 DEFAULT_TOWER_SIZE = 25
 DEFAULT_UNIT_SIZE = 50
+GRID_ENTER_TILES = [(0, 0)]  # (column, row) of the tiles units spawn on, negative counts from the end
+GRID_EXIT_TILES = [(-1, -1)]  # units walk to the nearest one
+
+# Simulation
+BATCH_UNITS = False  # tick all units with UnitEngine.UnitBatch instead of per Unit
+BATCH_PROJECTILES = False  # tick all projectiles with ProjectileEngine.ProjectilePool instead of per ProjectileBase
+FLOW_FIELD = False  # route with PathFinding.FlowField (vectorized next nodes, rebuilt per change) instead of the incremental DistanceField
+GC_FREEZE_STATIC_WORLD = False  # gc.freeze() after the grid is built, the collector then skips it during waves
 
 # Debug
-DEBUG_PRINT = True
+REPLAY_PATH = None  # record every game to this file (see Replay.py), written on exit
+INVARIANT_CHECKS = "sampled"  # off / sampled / full, see Invariants.CheckLevel
+INVARIANT_FULL_CHECK_TICKS = 60  # sampled: full check every this many ticks, only moved objects in between
+PROFILE = False  # attach Profiler timers to GameStuff, P also enables them in game and toggles the overlay
+PROFILE_DUMP_PATH = "profile"  # profile.json / profile.csv written on exit when profiling
+DEBUG_SHOW_ALL_RANGES = False  # draw every tower's range overlay, not only the hovered one (toggled with R)
 IGNORED_EVENTS = [pygame.MOUSEMOTION, pygame.KEYUP, pygame.WINDOWENTER, pygame.WINDOWLEAVE, pygame.ACTIVEEVENT, pygame.TEXTINPUT, pygame.AUDIODEVICEADDED, pygame.WINDOWSHOWN, pygame.WINDOWFOCUSLOST, pygame.WINDOWFOCUSGAINED, pygame.TEXTEDITING, pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWMOVED, pygame.WINDOWCLOSE]
 
 # Default other
-pygame.font.init()
-DEFAULT_FONT = pygame.font.SysFont(name=pygame.font.get_default_font(), size=32)
+_default_font = None
+
+
+def get_default_font():
+    # Created on first use so headless runs never initialize pygame.font
+    global _default_font
+    if _default_font is None:
+        pygame.font.init()
+        _default_font = pygame.font.SysFont(name=pygame.font.get_default_font(), size=32)
+    return _default_font
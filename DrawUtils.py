@@ -1,4 +1,6 @@
+from collections import OrderedDict
 from enum import Enum
+import math
 import pygame
 
 import Defaults
@@ -15,6 +17,10 @@ class Colors:
     YELLOW = (150, 150, 0)
 
 
+RANGE_OVERLAY_ALPHA = 48
+DEBUG_TEXT_WIDTH = 520
+
+
 class Shapes(Enum):
     CIRCLE = 0
     RECT = 1
@@ -28,8 +34,25 @@ class VisualManager:
         self._screen_height = self._screen_width / self._aspect_ratio[0] * self._aspect_ratio[1]
         self._ui_objects = {}
 
-    def draw_screen(self, grid, game_objects, player_info, current_round):
-        update_screen(screen=self._screen, grid=grid, game_objects=game_objects, player_info=player_info, round_info=current_round)
+        # Static layer (background + grid) rendered once, only the rects drawn over it are pushed to the display
+        self._background = None
+        self._background_grid = None
+        self._dirty_rects = []  # rects drawn last frame, erased with the background this frame
+
+    def draw_screen(self, grid, game_objects, player_info, current_round, highlight_tiles=None, debug_lines=None):
+        if self._background is None or self._background_grid is not grid:
+            self._background = create_background(self._screen.get_size(), grid)
+            self._background_grid = grid
+            self._screen.blit(self._background, (0, 0))
+            self._dirty_rects = draw_layers(self._screen, game_objects, player_info, current_round, highlight_tiles, debug_lines)
+            pygame.display.flip()
+            return
+
+        previous_rects = self._dirty_rects
+        for rect in previous_rects:
+            self._screen.blit(self._background, rect, rect)
+        self._dirty_rects = draw_layers(self._screen, game_objects, player_info, current_round, highlight_tiles, debug_lines)
+        pygame.display.update(previous_rects + self._dirty_rects)
 
     def initialize(self):
         self.resize_window(self._screen_width)
@@ -40,6 +63,7 @@ class VisualManager:
         if self._screen_height is None:
             self._screen_height = width / self._aspect_ratio[0] * self._aspect_ratio[1]
         self._screen = pygame.display.set_mode([self._screen_width, self._screen_height])
+        self._background = None
 
     def get_location(self, width_percent, height_percent):
         return self.get_size(width_percent, height_percent)
@@ -48,25 +72,105 @@ class VisualManager:
         return self._screen_width * width_percent, self._screen_height * height_percent
 
 
+class SpriteCache:
+    # Every distinct (shape, size, color, border) is rendered to a surface once, objects are then drawn by blitting
+    # those surfaces (one Surface.blits per frame). pygame truncates float positions for both draw and blit, so a
+    # sprite blitted at the truncated origin gives the same pixels as drawing the shape there. Bounded LRU.
+    MAX_SPRITES = 256
+    TRANSPARENT_KEY = (255, 0, 255)
+
+    def __init__(self):
+        self._sprites = OrderedDict()
+
+    def get_sprite_count(self):
+        return len(self._sprites)
+
+    def get_sprite(self, shape, size, color, only_border=False):
+        # Returns (surface, offset), offset is from the origin for rects and from the center for circles
+        if shape == Shapes.RECT:
+            size = (size[0], size[1])
+        key = (shape, size, color, only_border)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+        sprite = self._render(shape, size, color, only_border)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.MAX_SPRITES:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def _create_surface(self, width, height, color):
+        surface = pygame.Surface((width, height))
+        key = self.TRANSPARENT_KEY if color != self.TRANSPARENT_KEY else Colors.BLACK
+        surface.fill(key)
+        surface.set_colorkey(key, pygame.RLEACCEL)
+        return surface
+
+    def _render(self, shape, size, color, only_border):
+        if shape == Shapes.CIRCLE:
+            radius = math.ceil(size) + 2
+            surface = self._create_surface(radius * 2 + 1, radius * 2 + 1, color)
+            pygame.draw.circle(surface, color, (radius, radius), size, 3 if only_border else 0)
+            return surface, (-radius, -radius)
+        if only_border:
+            surface = self._create_surface(math.ceil(size[0]) + 4, math.ceil(size[1]) + 4, color)
+            for i in range(4):
+                pygame.draw.rect(surface, color, (3-i, 3-i, size[0]-1, size[1]-2), 1)
+            return surface, (0, 0)
+        surface = pygame.Surface((size[0], size[1]))
+        surface.fill(color)
+        return surface, (0, 0)
+
+
+_sprite_cache = SpriteCache()
+
+
+def get_sprite(shape, size, color, only_border=False):
+    return _sprite_cache.get_sprite(shape, size, color, only_border)
+
+
+def get_shape_sprite(origin, center_location, shape, size, color, only_border=False):
+    # (surface, location) pair for Surface.blits, None for unhandled shapes
+    if shape == Shapes.CIRCLE:
+        surface, offset = _sprite_cache.get_sprite(shape, size, color, only_border)
+        return surface, (int(center_location[0]) + offset[0], int(center_location[1]) + offset[1])
+    if shape == Shapes.RECT:
+        surface, offset = _sprite_cache.get_sprite(shape, size, color, only_border)
+        return surface, (int(origin[0]) + offset[0], int(origin[1]) + offset[1])
+    print("Err: Unhandled shape: " + str(shape))
+    return None
+
+
+def create_range_overlay(origin, center_location, shape, size, color):
+    # Translucent fill with the usual border, rendered once per tower range. Returns a (surface, location) pair
+    if shape == Shapes.CIRCLE:
+        radius = math.ceil(size) + 2
+        surface = pygame.Surface((radius * 2 + 1, radius * 2 + 1), pygame.SRCALPHA)
+        pygame.draw.circle(surface, color + (RANGE_OVERLAY_ALPHA,), (radius, radius), size)
+        pygame.draw.circle(surface, color, (radius, radius), size, 3)
+        return surface, (int(center_location[0]) - radius, int(center_location[1]) - radius)
+    if shape == Shapes.RECT:
+        surface = pygame.Surface((math.ceil(size[0]) + 4, math.ceil(size[1]) + 4), pygame.SRCALPHA)
+        surface.fill(color + (RANGE_OVERLAY_ALPHA,), (3, 3, size[0]-1, size[1]-2))
+        for i in range(4):
+            pygame.draw.rect(surface, color, (3-i, 3-i, size[0]-1, size[1]-2), 1)
+        return surface, (int(origin[0]), int(origin[1]))
+    print("Err: Unhandled shape: " + str(shape))
+    return None
+
+
 def draw_shape(screen, origin, center_location, shape, size, color, only_border=False):
+    # Returns the Rect that was drawn to (None if nothing was)
     try:
-        if only_border:
-            if shape == Shapes.RECT:
-                for i in range(4):
-                    pygame.draw.rect(screen, color, (origin[0]-i+3, origin[1]-i+3, size[0]-1, size[1]-2), 1)
-            if shape == Shapes.CIRCLE:
-                pygame.draw.circle(surface=screen, color=color, center=center_location, radius=size, width=3)
-            return
-        if shape == Shapes.CIRCLE:
-            pygame.draw.circle(surface=screen, color=color, center=center_location, radius=size)
-        elif shape == Shapes.RECT:
-            pygame.draw.rect(surface=screen, color=color, rect=(origin[0], origin[1], size[0], size[1]))
-        else:
-            print("Err: Unhandled shape: " + str(shape))
+        sprite = get_shape_sprite(origin, center_location, shape, size, color, only_border)
     except TypeError as e:
         print(e)
         print(screen, center_location, shape, size, color)
         exit(-5826)
+    if sprite is None:
+        return None
+    return screen.blit(*sprite)
 
 
 def draw_grid(screen, grid):
@@ -88,31 +192,117 @@ def draw_grid(screen, grid):
         start_location = (start_location[0]+row_size, start_location[1])
 
 
+def get_tile_highlight_sprites(tiles, color):
+    return [get_shape_sprite(tile.get_location(), tile.get_center_location(), Shapes.RECT, tile.get_size(), color, True) for tile in tiles]
+
+
+def draw_tile_highlights(screen, tiles, color):
+    return screen.blits(get_tile_highlight_sprites(tiles, color))
+
+
+class TextCache:
+    # Rendered strings keyed by (text, color), bounded LRU so changing numbers can't grow it without bound
+    def __init__(self, max_texts=64):
+        self._max_texts = max_texts
+        self._texts = OrderedDict()
+
+    def get_text_surface(self, text, color):
+        key = (text, color)
+        surface = self._texts.get(key)
+        if surface is not None:
+            self._texts.move_to_end(key)
+            return surface
+        surface = Defaults.get_default_font().render(text, False, color)
+        self._texts[key] = surface
+        if len(self._texts) > self._max_texts:
+            self._texts.popitem(last=False)
+        return surface
+
+    def get_cached_text_count(self):
+        return len(self._texts)
+
+
+class Hud:
+    # Player / round text, only re-rendered when one of the values changes. The lines are composited into one surface
+    # that is blitted once per frame.
+    LOCATION = (150, 0)
+    LINE_HEIGHT = 20
+    TRANSPARENT_KEY = (255, 0, 255)
+
+    def __init__(self, text_cache):
+        self._text_cache = text_cache
+        self._values = None
+        self._surface = None
+
+    def get_text_surface(self, text, color):
+        return self._text_cache.get_text_surface(text, color)
+
+    def _render(self, lines):
+        text_surfaces = [self.get_text_surface(line, Colors.WHITE) for line in lines]
+        width = max(t.get_width() for t in text_surfaces)
+        height = self.LINE_HEIGHT * (len(text_surfaces) - 1) + text_surfaces[-1].get_height()
+        surface = pygame.Surface((width, height))
+        surface.fill(self.TRANSPARENT_KEY)
+        surface.set_colorkey(self.TRANSPARENT_KEY, pygame.RLEACCEL)
+        surface.blits([(t, (0, i * self.LINE_HEIGHT)) for i, t in enumerate(text_surfaces)], False)
+        return surface
+
+    def draw(self, screen, player_info, round_info):
+        if round_info.prep_ticks > 0:
+            round_value = ("Prep Time = ", int(round_info.prep_ticks / 60.0))
+        else:
+            round_value = ("Units Remaining = ", round_info.units_remaining)
+        values = (player_info.health, player_info.gold, round_info.round_number, round_value)
+
+        if values != self._values:
+            self._values = values
+            self._surface = self._render(["Health = " + str(player_info.health),
+                                          "Gold = " + str(player_info.gold),
+                                          "Round = " + str(round_info.round_number),
+                                          round_value[0] + str(round_value[1])])
+        return screen.blit(self._surface, self.LOCATION)
+
+
+_text_cache = TextCache()
+_hud = Hud(_text_cache)
+
+
 def draw_ui(screen, player_info, round_info):
-    font = Defaults.DEFAULT_FONT
+    return [_hud.draw(screen, player_info, round_info)]
 
-    health_text = font.render("Health = " + str(player_info.health), False, Colors.WHITE)
-    gold_text = font.render("Gold = " + str(player_info.gold), False, Colors.WHITE)
-    round_num_text = font.render("Round = " + str(round_info.round_number), False, Colors.WHITE)
-    if round_info.prep_ticks > 0:
-        round_info_text = font.render("Prep Time = " + str(round_info.prep_ticks / 60.0).split(".")[0], False, Colors.WHITE)
-    else:
-        round_info_text = font.render("Units Remaining = " + str(round_info.units_remaining), False, Colors.WHITE)
 
-    screen.blit(health_text, (150, 0))
-    screen.blit(gold_text, (150, 20))
-    screen.blit(round_num_text, (150, 40))
-    screen.blit(round_info_text, (150, 60))
+def draw_text_lines(screen, lines, location, color=Colors.WHITE):
+    # Uncomposited, for debug overlays
+    return screen.blits([(_text_cache.get_text_surface(line, color), (location[0], location[1] + i * Hud.LINE_HEIGHT)) for i, line in enumerate(lines)])
 
 
-def update_screen(screen, grid, game_objects, player_info, round_info):
-    screen.fill(Colors.BLACK)
+def create_background(size, grid):
+    background = pygame.Surface(size)
+    background.fill(Colors.BLACK)
+    draw_grid(background, grid)
+    return background
 
-    draw_grid(screen, grid)
+
+def draw_layers(screen, game_objects, player_info, round_info, highlight_tiles=None, debug_lines=None):
+    # Everything drawn on top of the background, highlights and objects in one blits call. Returns the dirty rects
+    sprites = []
+    if highlight_tiles:
+        sprites += get_tile_highlight_sprites(highlight_tiles, Colors.GREEN)
 
     for game_object in game_objects:
         if game_object.is_visible():
-            game_object.draw_object(screen)
+            sprites += game_object.get_sprites()
+
+    rects = screen.blits([s for s in sprites if s is not None])
+    rects += draw_ui(screen, player_info, round_info)
+    if debug_lines:
+        rects += draw_text_lines(screen, debug_lines, (screen.get_width() - DEBUG_TEXT_WIDTH, 0), Colors.YELLOW)
+    return rects
 
-    draw_ui(screen, player_info, round_info)
+
+def update_screen(screen, grid, game_objects, player_info, round_info, highlight_tiles=None, debug_lines=None):
+    # Full redraw, VisualManager.draw_screen only redraws the dirty rects
+    screen.fill(Colors.BLACK)
+    draw_grid(screen, grid)
+    draw_layers(screen, game_objects, player_info, round_info, highlight_tiles, debug_lines)
     pygame.display.flip()
@@ -16,18 +16,29 @@ class ObjectType(Enum):
     TILE = 4
     NOT_IMPLEMENTED = 5
     INVALID = 6
+    BATCH = 7  # engines ticking many objects at once (UnitEngine, etc)
 
 
 class GameObject:
+    # Subclasses declare __slots__ for their own attributes too, objects are created per unit / projectile
+    __slots__ = ("_visible", "_location", "_previous_location", "_visual_location", "_color", "_shape", "_size", "_tile",
+                 "_object_type", "_hovered", "_manager")
+
     def __init__(self, location=None, visible=False):
-        self._visible = visible
-        self._location = location  # if None use tile location
-        self._visual_location = location
         self._color = Colors.GRAY
         self._shape = Shapes.CIRCLE
         self._size = Defaults.DEFAULT_OBJ_SIZE
-        self._tile = None
         self._object_type = ObjectType.INVALID
+        self._manager = None  # GameObjectManager indexing this object
+        GameObject.reset(self, location, visible)
+
+    def reset(self, location=None, visible=False):
+        # Back to a freshly constructed state, for objects reused by ObjectPools. Subclasses take their constructor's arguments.
+        self._visible = visible
+        self._location = location  # if None use tile location
+        self._previous_location = None  # location at the start of the last gameplay tick
+        self._visual_location = None  # interpolated between the last two gameplay locations, None to draw at location
+        self._tile = None
         self._hovered = False
 
     def initialize(self):
@@ -39,14 +50,31 @@ class GameObject:
     def get_type(self):
         return self._object_type
 
+    def get_tick_type(self):
+        # Objects tick grouped by this type (towers, then units, then projectiles, ...), engines ticking many objects at
+        # once return the type of the objects they tick so they keep their place in that order
+        return self._object_type
+
     def get_visible_location(self):
+        if self._visual_location is None:
+            return self.get_location()
         return self._visual_location
 
+    def get_visual_center_location(self):
+        if self._visual_location is None:
+            return self.get_center_location()
+        return self._get_center_of(self._visual_location)
+
     def is_visible(self):
         return self._visible
 
     def set_visible(self, visible=True):
         self._visible = visible
+        if self._manager is not None:
+            self._manager.update_visibility(self)
+
+    def set_manager(self, manager):
+        self._manager = manager
 
     def add_mouse_hover(self):
         self._hovered = True
@@ -55,22 +83,30 @@ class GameObject:
         self._hovered = False
 
     def get_center_location(self):
-        if self._location is None and self._tile is not None:
-            return self._tile.get_center_location()
-
-        if self._location is not None:
-            if self._shape == Shapes.CIRCLE:
-                loc = self.get_location()
-                return loc[0] + (self._size/2), loc[1] + (self._size/2)
-            elif self._shape == Shapes.RECT:
-                loc = self.get_location()
-                return loc[0] + (self._size[0]/2), loc[1] + (self._size[1]/2)
-            print("TODO: center location not implemented...")
-        return self.get_location()
+        if self._location is None:
+            if self._tile is not None:
+                return self._tile.get_center_location()
+            return None
+        return self._get_center_of(self._location)
+
+    def _get_center_of(self, loc):
+        if self._shape == Shapes.CIRCLE:
+            return loc[0] + (self._size/2), loc[1] + (self._size/2)
+        elif self._shape == Shapes.RECT:
+            return loc[0] + (self._size[0]/2), loc[1] + (self._size[1]/2)
+        print("TODO: center location not implemented...")
+        return loc
 
     def set_location(self, new_location):
         self._location = new_location
 
+    def set_center_location(self, center):
+        # For moving objects, which work in centers, location is derived from it
+        if self._shape == Shapes.RECT:
+            self._location = (center[0] - self._size[0]/2, center[1] - self._size[1]/2)
+        else:
+            self._location = (center[0] - self._size/2, center[1] - self._size/2)
+
     def get_location(self):
         if self._location is None and self._tile is not None:
             return self._tile.get_location()
@@ -104,13 +140,13 @@ class GameObject:
         self._shape = shape
         self._size = size
 
-    def draw_object(self, screen):
-        DrawUtils.draw_shape(screen, self.get_location(), self.get_center_location(), self._shape, self._size, self._color)
+    def get_sprites(self):
+        # (surface, location) pairs to blit, see DrawUtils.SpriteCache
+        return [DrawUtils.get_shape_sprite(self.get_visible_location(), self.get_visual_center_location(), self._shape, self._size, self._color)]
 
-    def verify_tile(self):
-        if self._tile is not None:
-            if self not in self._tile.debug_get_objects():
-                print("Err: invalid tile...")
+    def draw_object(self, screen):
+        # Returns the list of rects drawn to
+        return screen.blits([s for s in self.get_sprites() if s is not None])
 
     def set_tile(self, tile):
         self._tile = tile
@@ -121,8 +157,17 @@ class GameObject:
     def gameplay_tick(self):
         pass
 
-    def visual_tick(self):
-        pass
+    def save_previous_location(self):
+        self._previous_location = self._location
+
+    def visual_tick(self, alpha=1.0):
+        # alpha is how far (0 - 1) the visual frame is between the previous and the current gameplay tick
+        previous = self._previous_location
+        current = self._location
+        if previous is None or current is None:
+            self._visual_location = None
+        else:
+            self._visual_location = (previous[0] + (current[0] - previous[0]) * alpha, previous[1] + (current[1] - previous[1]) * alpha)
 
     def standard_click(self):
         print("base game obj clicked...")
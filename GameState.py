@@ -1,3 +1,4 @@
+import gc
 import pygame
 import time
 import random
@@ -6,17 +7,24 @@ import Defaults as Defaults
 import DrawUtils as DrawUtils
 import GameObjects as GameObjects
 import Grid as Grid
+import PathFinding as PathFinding
+import Profiler as Profiler
+import Replay as Replay
 import GameStates as GameStates
+import Invariants as Invariants
+import ObjectPools as ObjectPools
 import Units as Units
+import UnitEngine as UnitEngine
+import ProjectileEngine as ProjectileEngine
 import Cards as Cards
 
 from GameStates import GameState
 from GameStates import RoundState
 
-pygame.init()
-
 GAMEPLAY_FRAME_TIME = 1.0 / 60.0
-VISUAL_FRAME_TIME = 1.0 / 60.0
+VISUAL_FRAME_TIME = 1.0 / 144.0
+MAX_GAMEPLAY_TICKS_PER_FRAME = 5  # catch up at most this many ticks per visual frame, drop the rest
+PROFILER_OVERLAY_REFRESH_FRAMES = 30
 
 # TODO: Code cleanup
 # Make functions private where possible...
@@ -35,18 +43,28 @@ VISUAL_FRAME_TIME = 1.0 / 60.0
 # TODO: Gameplay mechanics
 # Sell towers for gold?
 # ability to 'remove' card (full cost?)?
-# How should mid round tower placing work (currently units make their path when spawned, goes through towers added after)?
+# How should mid round tower placing work (units re-route around towers added after, placing can't cut a unit off the exit)?
 # Many more towers!
 
 # TODO: Non-Gameplay mechanics
-# add visual location to GameObjects, and allow for visual tick sampling... (ie, allow for faster visual frame-rates then gameplay...)
 
 
 class GameObjectManager:
+    # Objects are indexed per type and per capability (tickable / visible / clickable), using dicts as insertion ordered
+    # sets keyed by the object itself so adding / removing is O(1). The get_*_objects lists are cached snapshots,
+    # safe to iterate while objects are added or removed mid-tick.
+    TICKABLE = 0
+    VISIBLE = 1
+    CLICKABLE = 2
+
     def __init__(self):
         self._game_objects = {}
         for t in GameObjects.ObjectType:
-            self._game_objects[t] = []
+            self._game_objects[t] = {}
+        self._indexes = {}  # capability : type : objects
+        for capability in [self.TICKABLE, self.VISIBLE, self.CLICKABLE]:
+            self._indexes[capability] = {t: {} for t in GameObjects.ObjectType}
+        self._snapshots = {}  # capability : cached list, dropped whenever the index changes
 
     def _get_all_objects(self):
         objects = []
@@ -54,41 +72,96 @@ class GameObjectManager:
             objects += v
         return objects
 
-    def debug_verify_tiles(self):
-        for game_obj in self._get_all_objects():
-            game_obj.verify_tile()
+    def _get_snapshot(self, capability):
+        snapshot = self._snapshots.get(capability)
+        if snapshot is None:
+            snapshot = [g for objects in self._indexes[capability].values() for g in objects]
+            self._snapshots[capability] = snapshot
+        return snapshot
+
+    def _set_indexed(self, capability, game_object, indexed):
+        object_type = game_object.get_tick_type() if capability == self.TICKABLE else game_object.get_type()
+        objects = self._indexes[capability][object_type]
+        if indexed == (game_object in objects):
+            return
+        if indexed:
+            objects[game_object] = None
+        else:
+            del objects[game_object]
+        self._snapshots.pop(capability, None)
 
     def get_clickable_objects(self, pos=None):
         if pos:
-            return [g for g in self._get_all_objects() if g.is_clickable() and g.check_collision(pos)]
+            return [g for g in self._get_snapshot(self.CLICKABLE) if g.check_collision(pos)]
         else:
-            return [g for g in self._get_all_objects() if g.is_clickable()]
+            return self._get_snapshot(self.CLICKABLE)
 
     def get_tickable_objects(self):
-        return [g for g in self._get_all_objects() if g.is_tickable()]
+        return self._get_snapshot(self.TICKABLE)
 
     def get_visible_objects(self):
-        return [g for g in self._get_all_objects() if g.is_visible()]
+        return self._get_snapshot(self.VISIBLE)
 
     def get_objects_of_type(self, object_type):
-        return self._game_objects[object_type]
+        return list(self._game_objects[object_type])
+
+    def contains(self, game_object):
+        return game_object in self._game_objects[game_object.get_type()]
+
+    def get_object_counts(self):
+        return {t: len(objects) for t, objects in self._game_objects.items()}
+
+    def update_visibility(self, game_object):
+        if game_object in self._game_objects[game_object.get_type()]:
+            self._set_indexed(self.VISIBLE, game_object, game_object.is_visible())
 
     def remove_game_object(self, game_object):
-        self._game_objects[game_object.get_type()].remove(game_object)
+        del self._game_objects[game_object.get_type()][game_object]
+        self._set_indexed(self.TICKABLE, game_object, False)
+        self._set_indexed(self.VISIBLE, game_object, False)
+        self._set_indexed(self.CLICKABLE, game_object, False)
+        game_object.set_manager(None)
 
     def add_game_object(self, game_object: GameObjects.GameObject):
-        self._game_objects[game_object.get_type()].append(game_object)
+        self._game_objects[game_object.get_type()][game_object] = None
+        self._set_indexed(self.TICKABLE, game_object, game_object.is_tickable())
+        self._set_indexed(self.VISIBLE, game_object, game_object.is_visible())
+        self._set_indexed(self.CLICKABLE, game_object, game_object.is_clickable())
+        game_object.set_manager(self)
+
+
+def get_default_rounds():
+    # Popped from the end, round 0 first
+    rounds = []
+    for i in range(100, 0, -1):
+        rounds.append(GameStates.RoundInfo(round_number=i, units=i*2, prep_seconds=10+i))
+    rounds.append(GameStates.RoundInfo(round_number=0, units=1, prep_seconds=30))
+    return rounds
 
 
 class GameStuff:
-    def __init__(self):
+    def __init__(self, rounds=None, headless=False, seed=None):
+        self.headless = headless  # no display, fonts or event pump (see Simulation.py)
+
+        # Everything random in gameplay comes from self.rng so a seed + Replay action log reproduces a game
+        self.seed = seed
+        if self.seed is None:
+            self.seed = random.randrange(2**32)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0  # gameplay ticks played
+        self.replay_recorder = None
+        self.replay_player = None
+        if Defaults.REPLAY_PATH is not None:
+            self.replay_recorder = Replay.ReplayRecorder(self.seed, Defaults.BATCH_UNITS, Defaults.BATCH_PROJECTILES, Defaults.FLOW_FIELD)
         self.visual_frame_time = VISUAL_FRAME_TIME
         self.gameplay_frame_time = GAMEPLAY_FRAME_TIME
 
         self.debug_uncap_frame_rate = False
+        self.dropped_gameplay_ticks = 0
 
         self.player_info = GameStates.PlayerInfo()
         self.gom = GameObjectManager()
+        self.object_pools = ObjectPools.ObjectPools()  # released units / projectiles, reused by create_game_unit / ShootTower
         self.vm = DrawUtils.VisualManager()
 
         self.mouse_hover_objects = []
@@ -97,10 +170,9 @@ class GameStuff:
         self.round_state = RoundState.PREP
         self.round_ticks = 0
 
-        self.rounds = []
-        for i in range(100, 0, -1):
-            self.rounds.append(GameStates.RoundInfo(round_number=i, units=i*2, prep_seconds=10+i))
-        self.rounds.append(GameStates.RoundInfo(round_number=0, units=1, prep_seconds=30))
+        self.rounds = rounds
+        if self.rounds is None:
+            self.rounds = get_default_rounds()
 
         self.current_round = self.rounds.pop()
 
@@ -113,6 +185,23 @@ class GameStuff:
         for tile in self.grid.get_tiles_flatten_list():
             self.gom.add_game_object(tile)
 
+        if Defaults.GC_FREEZE_STATIC_WORLD:
+            # Grid, tiles and everything built so far live for the whole game, keep them out of the collections during waves
+            gc.collect()
+            gc.freeze()
+
+        self.invariants = Invariants.InvariantChecker(self.grid, self.gom, Invariants.CheckLevel(Defaults.INVARIANT_CHECKS), Defaults.INVARIANT_FULL_CHECK_TICKS)
+
+        self.unit_batch = None
+        if Defaults.BATCH_UNITS:
+            self.unit_batch = UnitEngine.UnitBatch(self.grid)
+            self.gom.add_game_object(self.unit_batch)
+
+        self.projectile_pool = None
+        if Defaults.BATCH_PROJECTILES:
+            self.projectile_pool = ProjectileEngine.ProjectilePool(self.grid)
+            self.gom.add_game_object(self.projectile_pool)
+
         self.card_area = (self.vm.get_location(.05, .05), self.vm.get_location(.25, .95))
         self.card_locations = [self.vm.get_location(.1, .15),
                                self.vm.get_location(.1, .3),
@@ -120,8 +209,50 @@ class GameStuff:
                                self.vm.get_location(.1, .6),
                                self.vm.get_location(.1, .75)]
         self.card_size = self.vm.get_size(.1, .1)
+        self.card_slots = [None] * len(self.card_locations)
+
+        self.profiler = None
+        self.debug_show_profiler = False
+        self.profiler_overlay_lines = None
+        self.visual_frames = 0
+        if Defaults.PROFILE:
+            self.enable_profiler()
+
+    def enable_profiler(self):
+        # Wraps the subsystems with Profiler timers, nothing is timed (or costs anything) unless this is called
+        profiler = Profiler.Profiler()
+        for name in ["tick_round", "ingame_handle_events", "gameplay_tick_game_objects", "visual_tick"]:
+            profiler.instrument(self, name)
+        profiler.instrument(self, "game_tick", after=self.update_profiler_stats)
+        profiler.instrument(self.vm, "draw_screen")
+
+        # Path updates on the grid and every graph search run by PathFinding (bfs / dijkstra / tarjan)
+        grid = self.grid
+        profiler.instrument(grid, "update_shortest_path_cache", "path_rebuild")
+        profiler.instrument(grid, "update_tile_occupancy", "path_repair", after=lambda _: profiler.count("path_relaxed_nodes", grid.get_path_update_relaxed_count()))
+        for name in ["distance_field", "separating_nodes", "a_star", "weighted_distance_field", "flow_field"]:
+            profiler.instrument(PathFinding, name, "search_" + name)
+        self.profiler = profiler
+
+    def update_profiler_stats(self, _=None):
+        profiler = self.profiler
+        for t, count in self.gom.get_object_counts().items():
+            if count > 0:
+                profiler.set_gauge("objects_" + t.name.lower(), count)
+        profiler.set_counter("dropped_gameplay_ticks", self.dropped_gameplay_ticks)
+        for name, stats in self.object_pools.get_stats().items():
+            profiler.set_gauge("pool_" + name + "_in_use", stats["in_use"])
+            profiler.set_gauge("pool_" + name + "_free", stats["free"])
+
+    def close_profiler(self):
+        if self.profiler is None:
+            return
+        self.profiler.uninstrument()
+        self.profiler.dump(Defaults.PROFILE_DUMP_PATH)
+        self.profiler = None
 
     def initialize(self):
+        pygame.init()
         self.vm.initialize()
 
     def trigger_unit_end_tile(self, game_object, tile):
@@ -131,12 +262,14 @@ class GameStuff:
             self.player_info.health = 100
         tile.remove_object(game_object)
         self.gom.remove_game_object(game_object)
+        self.object_pools.release(game_object)
         self.current_round.units_remaining -= 1
 
     def trigger_unit_death(self, unit_object, tile):
         self.player_info.gold += unit_object.get_gold_value()
         tile.remove_object(unit_object)
         self.gom.remove_game_object(unit_object)
+        self.object_pools.release(unit_object)
         self.current_round.units_remaining -= 1
 
     def create_game_unit(self, tile):
@@ -145,7 +278,10 @@ class GameStuff:
             exit(-275)
         health = 20 + (2 * self.current_round.round_number)
         speed = 10.0 * ((self.current_round.round_number / 50) + 1.0)
-        unit_obj = Units.Unit(health=health, speed=speed, location=None, visible=True, death_event=self.trigger_unit_death, end_tile_event=self.trigger_unit_end_tile)
+        if self.unit_batch is not None:
+            unit_obj = self.object_pools.acquire(UnitEngine.BatchedUnit, batch=self.unit_batch, health=health, speed=speed, location=None, visible=True, death_event=self.trigger_unit_death, end_tile_event=self.trigger_unit_end_tile)
+        else:
+            unit_obj = self.object_pools.acquire(Units.Unit, health=health, speed=speed, location=None, visible=True, death_event=self.trigger_unit_death, end_tile_event=self.trigger_unit_end_tile)
 
         if unit_obj:
             self.gom.add_game_object(unit_obj)
@@ -159,6 +295,8 @@ class GameStuff:
             exit(-21)
 
         tower_obj = tower_type(visible=True, gom=self.gom)
+        tower_obj.set_projectile_pool(self.projectile_pool)
+        tower_obj.set_object_pools(self.object_pools)
         tile.add_object(tower_obj)
 
         self.gom.add_game_object(tower_obj)
@@ -187,10 +325,9 @@ class GameStuff:
                 if self.held_object is not None and event.button == 1:  # left click
                     if self.held_object.get_type() == GameObjects.ObjectType.CARD:
                         card = self.held_object
-                        tile = self.grid.get_closest_tile(pygame.mouse.get_pos())
+                        tile = self.grid.get_closest_tile(event.pos)
                         if self.can_use_card_on_tile(card, tile):
-                            self.create_tower(card.get_tower_type(), tile)
-                            self.replace_card(card)
+                            self.apply_action(Replay.Action.PLACE_CARD, self.card_slots.index(card), tile.get_node_id())
                     self.held_object.click_release()
                     self.held_object = None
 
@@ -214,36 +351,65 @@ class GameStuff:
                     tile = self.grid.get_closest_tile(event.pos)
                     if tile:
                         if tile.contains_tower():
-                            tower = tile.remove_tower()
-                            self.gom.remove_game_object(tower)
+                            self.apply_action(Replay.Action.REMOVE_TOWER, tile.get_node_id())
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     exit()
                 elif event.key == pygame.K_u:
-                    self.debug_send_unit()
+                    self.apply_action(Replay.Action.SEND_UNIT)
                 elif event.key == pygame.K_SPACE:
                     if self.round_state == RoundState.PREP:
-                        self.round_state = RoundState.ROUND
-                        self.current_round.prep_ticks = 0
-                        self.current_round.units_remaining = self.current_round.units
-                        self.round_ticks = 0
+                        self.apply_action(Replay.Action.START_ROUND)
                 elif event.key == pygame.K_LEFT:
                     self.gameplay_frame_time = self.gameplay_frame_time * 2
                 elif event.key == pygame.K_RIGHT:
                     self.gameplay_frame_time = self.gameplay_frame_time / 2
                 elif event.key == pygame.K_UP:
                     self.debug_uncap_frame_rate = not self.debug_uncap_frame_rate
+                elif event.key == pygame.K_p:
+                    if self.profiler is None:
+                        self.enable_profiler()
+                    self.debug_show_profiler = not self.debug_show_profiler
+                elif event.key == pygame.K_r:
+                    Defaults.DEBUG_SHOW_ALL_RANGES = not Defaults.DEBUG_SHOW_ALL_RANGES
             elif event.type == pygame.QUIT:
                 self.running = False
             else:
                 print("   unassigned_event: " + str(event))
 
-    def debug_verify_tiles(self):
-        self.grid.debug_verify_objects()
-        self.gom.debug_verify_tiles()
+    def apply_action(self, action, arg_a=0, arg_b=0):
+        # All state changing input goes through here so it can be recorded / played back (Replay.Action)
+        if self.replay_recorder is not None:
+            self.replay_recorder.record(self.ticks, action, arg_a, arg_b)
+
+        if action == Replay.Action.PLACE_CARD:
+            card = self.card_slots[arg_a]
+            tile = self.grid.get_tile_by_id(arg_b)
+            if card is not None and self.can_use_card_on_tile(card, tile):
+                self.create_tower(card.get_tower_type(), tile)
+                self.replace_card(card)
+        elif action == Replay.Action.REMOVE_TOWER:
+            tile = self.grid.get_tile_by_id(arg_a)
+            if tile.contains_tower():
+                tower = tile.remove_tower()
+                self.gom.remove_game_object(tower)
+        elif action == Replay.Action.START_ROUND:
+            if self.round_state == RoundState.PREP:
+                self.round_state = RoundState.ROUND
+                self.current_round.prep_ticks = 0
+                self.current_round.units_remaining = self.current_round.units
+                self.round_ticks = 0
+        elif action == Replay.Action.SEND_UNIT:
+            self.debug_send_unit()
+
+    def close_replay(self):
+        if self.replay_recorder is None:
+            return
+        self.replay_recorder.save(Defaults.REPLAY_PATH)
+        self.replay_recorder = None
 
     def get_card(self):
-        r = random.randint(0, 2)
+        r = self.rng.randint(0, 2)
         if r == 0:
             card = Cards.MazeCard()
         elif r == 1:
@@ -260,23 +426,38 @@ class GameStuff:
         new_card = self.get_card()
         new_card.set_location(loc)
         new_card.set_visible(True)
+        self.card_slots[self.card_slots.index(card)] = new_card
 
-    def gameplay_tick_game_objects(self):
+    def gameplay_tick_game_objects(self, subsystem_seconds=None):
+        if subsystem_seconds is None:
+            for game_object in self.gom.get_tickable_objects():
+                game_object.save_previous_location()
+                game_object.gameplay_tick()
+            return
+
+        # Timed per object type (the snapshot is ordered by type)
+        now = time.perf_counter()
         for game_object in self.gom.get_tickable_objects():
+            game_object.save_previous_location()
             game_object.gameplay_tick()
+            end = time.perf_counter()
+            name = game_object.get_type().name.lower()
+            subsystem_seconds[name] = subsystem_seconds.get(name, 0.0) + end - now
+            now = end
 
-    def visual_tick_game_objects(self):
+    def visual_tick_game_objects(self, alpha=1.0):
         if self.held_object:
             self.held_object.visual_tick_held(pygame.mouse.get_pos())
 
         for game_object in self.gom.get_tickable_objects():
-            game_object.visual_tick()
+            game_object.visual_tick(alpha)
 
     def init_cards(self):
         for i in range(5):
             new_card = self.get_card()
             new_card.set_location(loc=self.card_locations[i])
             new_card.set_visible()
+            self.card_slots[i] = new_card
 
     def tick_round(self):
         self.round_ticks += 1
@@ -293,7 +474,8 @@ class GameStuff:
                 self.round_state = RoundState.POST
                 self.round_ticks = 0
             elif b_spawn_unit and self.current_round.units_summoned < self.current_round.units:
-                self.create_game_unit(self.grid.get_enter_tile())
+                enter_tiles = self.grid.get_enter_tiles()
+                self.create_game_unit(enter_tiles[self.current_round.units_summoned % len(enter_tiles)])
                 self.current_round.units_summoned += 1
         elif self.round_state == RoundState.POST:
             self.round_ticks = 0
@@ -323,13 +505,30 @@ class GameStuff:
                 g.add_mouse_hover()
                 self.mouse_hover_objects.append(g)
 
-    def pve_tick(self):
+    def pve_tick(self, subsystem_seconds=None):
+        # subsystem_seconds: optional dict the time spent per step and per object type is added to (HeadlessSimulation)
+        if subsystem_seconds is not None:
+            start = time.perf_counter()
         self.tick_round()
-        self.ingame_handle_events()
-        self.gameplay_tick_game_objects()
-
-        if Defaults.DEBUG_PRINT:
-            self.debug_verify_tiles()
+        if self.replay_player is not None:
+            self.replay_player.apply_actions(self)
+        elif not self.headless:
+            self.ingame_handle_events()
+        if subsystem_seconds is not None:
+            subsystem_seconds["tick_round"] = subsystem_seconds.get("tick_round", 0.0) + time.perf_counter() - start
+        self.gameplay_tick_game_objects(subsystem_seconds)
+
+        if subsystem_seconds is not None:
+            start = time.perf_counter()
+        self.invariants.tick()
+        self.object_pools.recycle()
+        if self.replay_recorder is not None:
+            self.replay_recorder.end_tick(self)
+        if self.replay_player is not None:
+            self.replay_player.end_tick(self)
+        self.ticks += 1
+        if subsystem_seconds is not None:
+            subsystem_seconds["invariants"] = subsystem_seconds.get("invariants", 0.0) + time.perf_counter() - start
 
     def game_tick(self):
         if self.game_state == GameState.MENU:
@@ -337,31 +536,72 @@ class GameStuff:
         elif self.game_state == GameState.PVE:
             self.pve_tick()
 
-    def visual_tick(self):
-        self.visual_tick_game_objects()
+    def get_held_card_tiles(self):
+        # Tiles the held card could be dropped on
+        if self.held_object is None or self.held_object.get_type() != GameObjects.ObjectType.CARD:
+            return None
+        if not self.player_info.gold >= self.held_object.get_tower_type().COST:
+            return None
+        return self.grid.get_placeable_tiles()
+
+    def get_profiler_overlay_lines(self):
+        if not self.debug_show_profiler or self.profiler is None:
+            return None
+        if self.profiler_overlay_lines is None or self.visual_frames % PROFILER_OVERLAY_REFRESH_FRAMES == 0:
+            self.profiler_overlay_lines = ["p50/p95/p99"] + self.profiler.get_overlay_lines()
+        return self.profiler_overlay_lines
+
+    def visual_tick(self, alpha=1.0):
+        self.visual_frames += 1
+        self.visual_tick_game_objects(alpha)
         game_objects = self.gom.get_visible_objects()
-        self.vm.draw_screen(self.grid, game_objects, self.player_info, self.current_round)
+        self.vm.draw_screen(self.grid, game_objects, self.player_info, self.current_round, self.get_held_card_tiles(), self.get_profiler_overlay_lines())
 
     def game_loop(self):
+        # Fixed gameplay timestep: real time is accumulated and consumed in gameplay_frame_time ticks, visual frames
+        # interpolate between the last two ticks, the loop sleeps until either is due
         self.init_cards()
-        prev_visual_time = 0
-        prev_gameplay_time = 0
+        prev_time = time.perf_counter()
+        next_visual_time = prev_time
+        accumulator = 0.0
         while self.running:
-            dropped_gameplay_frame = False
-            if self.gameplay_frame_time - (time.time() - prev_gameplay_time) <= 0 or self.debug_uncap_frame_rate:
-                prev_gameplay_time = time.time()
-                self.game_tick()
-                if self.gameplay_frame_time - (time.time() - prev_gameplay_time) < 0:
-                    dropped_gameplay_frame = True
-                    print("dropped gameplay frame")
+            now = time.perf_counter()
+            accumulator += now - prev_time
+            prev_time = now
 
-            if not dropped_gameplay_frame and self.visual_frame_time - (time.time() - prev_visual_time) <= 0:
-                prev_visual_time = time.time()
-                self.visual_tick()
-                if self.visual_frame_time - (time.time() - prev_visual_time) < 0:
-                    print("dropped visual frame")
+            if self.debug_uncap_frame_rate:
+                self.game_tick()
+                accumulator = 0.0
+            else:
+                ticks = 0
+                while accumulator >= self.gameplay_frame_time and ticks < MAX_GAMEPLAY_TICKS_PER_FRAME:
+                    self.game_tick()
+                    accumulator -= self.gameplay_frame_time
+                    ticks += 1
+                if accumulator >= self.gameplay_frame_time:
+                    # Too far behind to catch up, drop the backlog instead of spiraling
+                    self.dropped_gameplay_ticks += int(accumulator / self.gameplay_frame_time)
+                    accumulator %= self.gameplay_frame_time
+
+            now = time.perf_counter()
+            if now >= next_visual_time:
+                self.visual_tick(min(accumulator / self.gameplay_frame_time, 1.0))
+                next_visual_time += self.visual_frame_time
+                if next_visual_time < now:
+                    next_visual_time = now + self.visual_frame_time
+
+            if not self.debug_uncap_frame_rate:
+                now = time.perf_counter()
+                next_gameplay_time = now + self.gameplay_frame_time - accumulator - (now - prev_time)
+                wait = min(next_visual_time, next_gameplay_time) - now
+                if wait > 0:
+                    time.sleep(wait)
 
     def start(self):
         self.running = True
-        self.game_loop()
+        try:
+            self.game_loop()
+        finally:
+            self.close_profiler()
+            self.close_replay()
         pygame.quit()
@@ -1,9 +1,13 @@
+from array import array
 from enum import Enum
+import math
+import numpy as np
 
 import DrawUtils as DrawUtils
 import Defaults as Defaults
 import GameObjects as GameObjects
 import MathUtils as Math
+import PathFinding as PathFinding
 
 
 class Direction(Enum):
@@ -15,30 +19,35 @@ class Direction(Enum):
 
 
 class Tile(GameObjects.GameObject):
+    __slots__ = ("_grid", "_game_objects", "_tower_counts", "_units", "_grid_loc", "_left_tile", "_right_tile", "_up_tile",
+                 "_down_tile", "_linked_tiles", "_node_id", "_center")
+
     def __init__(self, grid, loc=(0, 0), grid_loc=(0, 0), size=(0, 0), node_id=-1):
-        GameObjects.GameObject.__init__(self, loc, False)
+        GameObjects.GameObject.__init__(self, None, False)
         self._object_type = GameObjects.ObjectType.TILE
         self._grid = grid
         self._game_objects = []
+        self._tower_counts = grid.get_tower_counts()  # shared with grid, indexed by node id
+        self._units = grid.get_units_by_node()[node_id]  # shared with grid
         self._grid_loc = grid_loc
-        self._location = (loc[0] - size[0]/2, loc[1] - size[1]/2)  # loc
         self._left_tile = None
         self._right_tile = None
         self._up_tile = None
         self._down_tile = None
         self._linked_tiles = []
-        self._node_id = node_id  # TODO: Node id's for optimizations (shortest path, etc)
+        self._node_id = node_id  # index into Grid's flat per-node arrays (shortest path, etc)
 
         self._visible = False
         self._color = DrawUtils.Colors.RED
-        self._shape = DrawUtils.Shapes.RECT
-        self._size = size
+        self.set_shape(DrawUtils.Shapes.RECT, size)
+        self.set_location((loc[0] - size[0]/2, loc[1] - size[1]/2))  # loc is the center, never changes
+        self._center = self._get_center_of(self._location)  # read every time a unit steps, so kept
 
     def get_size(self):
         return self._size
 
-    def draw_object(self, screen):
-        DrawUtils.draw_shape(screen, self.get_location(), self.get_center_location(), self._shape, self._size, self._color, True)
+    def get_sprites(self):
+        return [DrawUtils.get_shape_sprite(self.get_location(), self.get_center_location(), self._shape, self._size, self._color, True)]
 
     def get_left(self):
         return self._left_tile
@@ -58,6 +67,12 @@ class Tile(GameObjects.GameObject):
     def get_path_to_exit_tile(self):
         return self._grid.get_shortest_path(tile1=self, tile2=None)
 
+    def get_next_tile_to_exit(self):
+        return self._grid.get_next_tile(self)
+
+    def is_exit_tile(self):
+        return self._grid.is_exit_tile(self)
+
     def debug_get_objects(self):
         return self._game_objects
 
@@ -76,14 +91,20 @@ class Tile(GameObjects.GameObject):
         self._down_tile = down_tile
         self._linked_tiles = [x for x in [left_tile, right_tile, up_tile, down_tile] if x is not None]
 
+    def get_node_id(self):
+        return self._node_id
+
+    def get_grid(self):
+        return self._grid
+
     def get_location(self):
         return self._location
 
+    def get_center_location(self):
+        return self._center
+
     def is_occupied(self):
-        for game_obj in self._game_objects:
-            if game_obj.get_type() == GameObjects.ObjectType.TOWER:
-                return True
-        return False
+        return self._tower_counts[self._node_id] != 0
 
     def get_neighbors(self):
         return self._linked_tiles
@@ -92,27 +113,17 @@ class Tile(GameObjects.GameObject):
         neighbors = [x for x in self._linked_tiles if not x.is_occupied()]
         return neighbors
 
-    def get_tiles_in_range(self, distance):
-        tiles_in_range = []
-        grid_range = [[self._grid_loc[0] - distance, self._grid_loc[1] - distance], [self._grid_loc[0] + distance, self._grid_loc[1] + distance]]
-
-        x1 = max(grid_range[0][0], 0)
-        y1 = max(grid_range[0][1], 0)
+    def get_grid_loc(self):
+        return self._grid_loc
 
-        for i in range(x1, grid_range[1][0]):
-            for j in range(y1, grid_range[1][1]):
-                cur_tile = self._grid.get_tile_by_index([i, j])
-                if cur_tile:
-                    if Math.distance(cur_tile.get_center_location(), self.get_center_location()) <= distance:
-                        tiles_in_range.append(cur_tile)
-        return tiles_in_range
+    def get_tiles_in_range(self, distance):
+        # Tiles with their center within distance (pixels) of this tile's center
+        return self._grid.get_tiles_in_range(self, distance)
 
     def add_object(self, game_obj):
-        was_occupied = self.is_occupied()
         self._game_objects.append(game_obj)
         game_obj.set_tile(self)
-        if self.is_occupied() != was_occupied:
-            self._grid.update_shortest_path_cache()
+        self._grid.index_tile_object(self, game_obj)
 
     def remove_tower(self):
         for game_obj in self._game_objects:
@@ -122,10 +133,8 @@ class Tile(GameObjects.GameObject):
         return None
 
     def remove_object(self, game_obj):
-        was_occupied = self.is_occupied()
         self._game_objects.remove(game_obj)
-        if was_occupied != self.is_occupied():
-            self._grid.update_shortest_path_cache()
+        self._grid.unindex_tile_object(self, game_obj)
 
     def is_unit_in_range(self, inner_range, outer_range):
         pass
@@ -138,43 +147,156 @@ class Tile(GameObjects.GameObject):
         return objects
 
     def contains_type(self, object_type):
+        if object_type == GameObjects.ObjectType.TOWER:
+            return self.is_occupied()
+        if object_type == GameObjects.ObjectType.UNIT:
+            return len(self._units) > 0
         for game_obj in self._game_objects:
             if game_obj.get_type() == object_type:
                 return True
         return False
 
     def get_tower(self):
-        towers = self.get_objects_of_type(GameObjects.ObjectType.TOWER)
-        if len(towers) == 0:
+        if not self.is_occupied():
             return None
-        return towers[0]
+        return self.get_objects_of_type(GameObjects.ObjectType.TOWER)[0]
 
     def contains_tower(self):
         return self.contains_type(GameObjects.ObjectType.TOWER)
 
     def contains_units(self):
-        return self.contains_type(GameObjects.ObjectType.UNIT)
+        return len(self._units) > 0
 
     def get_units(self):
-        return [x for x in self._game_objects if x.get_type() == GameObjects.ObjectType.UNIT]
+        # Shared bucket owned by the grid, copy it before killing units while iterating
+        return self._units
+
+
+_range_stencils = {}  # (distance, tile size) : offsets of tiles in range, shared by every tower
+
+
+def get_range_stencil(distance, tile_size):
+    # Column / row offsets (numpy arrays) of every tile whose center is within distance of the center tile, ordered by
+    # column then row like the node ids
+    key = (distance, tile_size)
+    stencil = _range_stencils.get(key)
+    if stencil is None:
+        w, h = tile_size
+        max_i = int(distance // w)
+        max_j = int(distance // h)
+        offsets = [(i, j) for i in range(-max_i, max_i + 1) for j in range(-max_j, max_j + 1) if Math.distance((i * w, j * h), (0, 0)) <= distance]
+        stencil = (np.array([o[0] for o in offsets], dtype=np.intp), np.array([o[1] for o in offsets], dtype=np.intp))
+        _range_stencils[key] = stencil
+    return stencil
+
+
+def closest_center_index(centers, value, cell):
+    # Index of the closest of evenly spaced, sorted centers to value, given cell = (value - start) / spacing. Rounding of
+    # the spacing can put value in the cell next to the closest one, so the neighbor centers are compared like a scan
+    # over every center would, ties go to the lower index. Values outside clamp to the first / last center.
+    i = min(max(math.floor(cell), 0), len(centers) - 1)
+    dist = (centers[i] - value) * (centers[i] - value)
+    if i > 0 and (centers[i - 1] - value) * (centers[i - 1] - value) <= dist:
+        return i - 1
+    if i + 1 < len(centers) and (centers[i + 1] - value) * (centers[i + 1] - value) < dist:
+        return i + 1
+    return i
+
+
+def closest_center_indices(centers, values, cells):
+    # Vectorized closest_center_index, centers is a numpy array
+    last = len(centers) - 1
+    i = np.clip(np.floor(cells).astype(np.intp), 0, last)
+    lower = np.maximum(i - 1, 0)
+    upper = np.minimum(i + 1, last)
+    dist = (centers[i] - values) * (centers[i] - values)
+    lower_dist = (centers[lower] - values) * (centers[lower] - values)
+    upper_dist = (centers[upper] - values) * (centers[upper] - values)
+    return np.where((i > 0) & (lower_dist <= dist), lower, np.where(upper_dist < dist, upper, i))
+
+
+class Path:
+    # Immutable shortest path handed out by Grid.get_shortest_path. The same object is shared by every caller until the
+    # grid's occupancy changes, callers follow it with their own integer cursor (get_step) and check is_stale().
+    __slots__ = ("_grid", "_tiles", "_version")
+
+    def __init__(self, grid, tiles, version):
+        self._grid = grid
+        self._tiles = tuple(tiles)  # target first, same order as PathFinding.follow_next_nodes
+        self._version = version
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def __iter__(self):
+        return iter(self._tiles)
+
+    def __getitem__(self, index):
+        return self._tiles[index]
+
+    def get_tiles(self):
+        return self._tiles
+
+    def get_version(self):
+        return self._version
+
+    def is_stale(self):
+        return self._version != self._grid.get_path_version()
+
+    def get_step(self, cursor):
+        # Tile cursor steps from the start tile (0 is the start), None past the target
+        if cursor >= len(self._tiles):
+            return None
+        return self._tiles[-1 - cursor]
 
 
 class Grid:
-    def __init__(self, loc, size, rows=Defaults.DEFAULT_GRID_ROWS, cols=Defaults.DEFAULT_GRID_COLS):
+    def __init__(self, loc, size, rows=Defaults.DEFAULT_GRID_ROWS, cols=Defaults.DEFAULT_GRID_COLS, enter_tiles=None, exit_tiles=None):
         self._location = loc
         self._width = size[0]
         self._height = size[1]
 
         self._color = DrawUtils.Colors.WHITE
 
-        self._enter_tile = None
+        self._rows = rows
+        self._cols = cols
+
+        # Per node id occupancy, updated by Tile.add_object / remove_object
+        self._tower_counts = bytearray(rows * cols)
+        self._tower_array = np.frombuffer(self._tower_counts, dtype=np.uint8)  # same memory, for vectorized use
+        self._units_by_node = [[] for _ in range(rows * cols)]
+        self._unit_counts = array("i", bytes(4 * rows * cols))  # len of each units bucket
+        self._unit_count_array = np.frombuffer(self._unit_counts, dtype=np.int32)
+
+        # Per node id cost of stepping onto the tile (integer >= 1), see set_tile_cost
+        self._tile_costs = array("H", [1]) * (rows * cols)
+        self._weighted_tile_count = 0  # tiles with a cost other than 1, routing is unweighted while 0
+        self._min_tile_cost = 1
+
+        # Coverage map, towers watching each node id get notified when units enter / leave it
+        self._tile_watchers = [[] for _ in range(rows * cols)]
+        self._watched_nodes = {}  # watcher : node ids
+        self._tile_listener = None
+
+        self._enter_tiles = []  # units spawn on these, every one needs a path to an exit
+        self._exit_tiles = []
+        self._enter_tile = None  # first of _enter_tiles / _exit_tiles
         self._exit_tile = None
-        self._shortest_path_cache = []  # stores the shortest distance to tile from enter_tile
+        self._exit_nodes = bytearray(rows * cols)  # 1 for exit tiles
+        self._exit_mask = np.frombuffer(self._exit_nodes, dtype=np.bool_)  # same memory, for vectorized use
+        self._exit_field = None  # distance / next node id towards the nearest exit tile per node id
+        self._separating_nodes = None  # tiles that would cut an enter tile or a unit off every exit, None until needed
+        self._placeable_tiles = None
+        self._path_version = 0  # bumped whenever occupancy changes paths, see Path.is_stale
+        self._path_cache = {}  # (start node id, end node id) : Path for the current _path_version
 
         w = self._width / cols
         h = self._height / rows
+        self._tile_width = w
+        self._tile_height = h
         l0, l1 = (self._location[0] + w/2, self._location[1] + h/2)
-        self._tiles = [[Tile(self, (l0+w*i, l1+h*j), (i, j), (w, h), (i*cols+j)) for j in range(rows)] for i in range(cols)]
+        self._tiles = [[Tile(self, (l0+w*i, l1+h*j), (i, j), (w, h), (i*rows+j)) for j in range(rows)] for i in range(cols)]
+        self._tiles_by_id = self.get_tiles_flatten_list()
 
         # Link tiles (can be optimized)
         for i in range(len(self._tiles)):
@@ -191,17 +313,45 @@ class Grid:
 
                 self._tiles[i][j].link_tiles(left, right, up, down)
 
-        self._enter_tile = self._tiles[0][0]
-        self._exit_tile = self._tiles[-1][-1]
+        self._neighbor_ids = [tuple(x.get_node_id() for x in tile.get_neighbors()) for tile in self._tiles_by_id]
+        self._tile_centers = np.array([tile.get_center_location() for tile in self._tiles_by_id], dtype=np.float64)
+        self._column_centers = [self._tiles[i][0].get_center_location()[0] for i in range(cols)]  # for closest tile lookups
+        self._row_centers = [self._tiles[0][j].get_center_location()[1] for j in range(rows)]
+        self._column_center_array = np.array(self._column_centers, dtype=np.float64)
+        self._row_center_array = np.array(self._row_centers, dtype=np.float64)
+
+        # (column, row) indices, negative count from the end
+        if enter_tiles is None:
+            enter_tiles = Defaults.GRID_ENTER_TILES
+        if exit_tiles is None:
+            exit_tiles = Defaults.GRID_EXIT_TILES
+        self._enter_tiles = [self._tiles[i][j] for i, j in enter_tiles]
+        self._exit_tiles = [self._tiles[i][j] for i, j in exit_tiles]
+        self._enter_tile = self._enter_tiles[0]
+        self._exit_tile = self._exit_tiles[0]
+        for tile in self._exit_tiles:
+            self._exit_nodes[tile.get_node_id()] = 1
 
         self.update_shortest_path_cache()
 
-        self._rows = rows
-        self._cols = cols
-
     def get_enter_tile(self):
         return self._enter_tile
 
+    def get_exit_tile(self):
+        return self._exit_tile
+
+    def get_enter_tiles(self):
+        return self._enter_tiles
+
+    def get_exit_tiles(self):
+        return self._exit_tiles
+
+    def is_exit_tile(self, tile):
+        return self._exit_nodes[tile.get_node_id()] != 0
+
+    def get_exit_mask(self):
+        return self._exit_mask
+
     def get_location(self):
         return self._location
 
@@ -215,72 +365,218 @@ class Grid:
         return self._rows, self._cols
 
     def get_shortest_path(self, tile1=None, tile2=None):
+        # Shared Path (or None if unreachable or tile1 is tile2), cached until the next occupancy change. Without tile2
+        # the path leads to the nearest exit tile.
         if tile1 is None:
             tile1 = self._enter_tile
-        if tile2 is None:
+        if tile2 is None and len(self._exit_tiles) == 1:
             tile2 = self._exit_tile
 
-        if tile1 == self._enter_tile:
-            previous_nodes = self._shortest_path_cache
+        key = (tile1.get_node_id(), None if tile2 is None else tile2.get_node_id())
+        if key in self._path_cache:
+            return self._path_cache[key]
+
+        if tile2 is None:
+            path = PathFinding.follow_next_nodes(self._exit_field.next_nodes, tile1.get_node_id())
+        elif tile2 == self._exit_tile and len(self._exit_tiles) == 1:
+            path = PathFinding.follow_next_nodes(self._exit_field.next_nodes, tile1.get_node_id(), tile2.get_node_id())
         else:
-            # TODO: Can be optimized farther to use cache if it contains the tile
-            _, previous_nodes, unreachable_nodes = Math.pseudo_dijkstra(self.get_tiles_flatten_list(), tile1)
+            path, _, _ = PathFinding.a_star(self._neighbor_ids, self.get_blocked_nodes(), self._tile_costs, tile1.get_node_id(), tile2.get_node_id(), self._rows, self._min_tile_cost)
+        if path is not None:
+            path = Path(self, [self._tiles_by_id[node_id] for node_id in path], self._path_version)
+        self._path_cache[key] = path
+        return path
+
+    def get_path_version(self):
+        return self._path_version
+
+    def get_tile_costs(self):
+        return self._tile_costs
+
+    def get_tile_cost(self, tile):
+        return self._tile_costs[tile.get_node_id()]
+
+    def set_tile_cost(self, tile, cost):
+        # Slow terrain etc, units route around tiles with a higher cost when there is a cheaper way to an exit
+        if cost != int(cost) or not 1 <= cost <= 0xFFFF:
+            raise ValueError("tile cost must be an integer from 1 to 65535: " + str(cost))
+        cost = int(cost)  # before any state changes, the cost array only takes ints
+        node_id = tile.get_node_id()
+        if self._tile_costs[node_id] == cost:
+            return
+        self._weighted_tile_count += (cost != 1) - (self._tile_costs[node_id] != 1)
+        self._tile_costs[node_id] = cost
+        self._min_tile_cost = min(self._tile_costs)
+        self.update_shortest_path_cache()
 
-        # reverse traverse previous nodes...
-        tile_list = [tile2]
-        previous_node = previous_nodes[tile2]
-        if previous_node is None:
+    def get_blocked_nodes(self):
+        return bytearray(self._tower_counts)
+
+    def get_tower_counts(self):
+        return self._tower_counts
+
+    def get_tower_array(self):
+        return self._tower_array
+
+    def get_units_by_node(self):
+        return self._units_by_node
+
+    def get_unit_count_array(self):
+        return self._unit_count_array
+
+    def watch_tiles(self, watcher, tiles):
+        self.unwatch_tiles(watcher)
+        node_ids = [t.get_node_id() for t in tiles]
+        self._watched_nodes[watcher] = node_ids
+        for node_id in node_ids:
+            self._tile_watchers[node_id].append(watcher)
+            for unit in self._units_by_node[node_id]:
+                watcher.unit_entered_range(unit)
+
+    def unwatch_tiles(self, watcher):
+        for node_id in self._watched_nodes.pop(watcher, ()):
+            self._tile_watchers[node_id].remove(watcher)
+
+    def set_tile_listener(self, listener):
+        # listener(tile, game_obj) is called whenever an object is added to a tile (Invariants.InvariantChecker)
+        self._tile_listener = listener
+
+    def index_tile_object(self, tile, game_obj):
+        if self._tile_listener is not None:
+            self._tile_listener(tile, game_obj)
+        object_type = game_obj.get_type()
+        if object_type == GameObjects.ObjectType.UNIT:
+            node_id = tile.get_node_id()
+            self._units_by_node[node_id].append(game_obj)
+            self._unit_counts[node_id] += 1
+            if self._unit_counts[node_id] == 1:
+                self._invalidate_placement_cache()
+            for watcher in self._tile_watchers[node_id]:
+                watcher.unit_entered_range(game_obj)
+        elif object_type == GameObjects.ObjectType.TOWER:
+            node_id = tile.get_node_id()
+            self._tower_counts[node_id] += 1
+            if self._tower_counts[node_id] == 1:
+                self.update_tile_occupancy(tile)
+
+    def unindex_tile_object(self, tile, game_obj):
+        object_type = game_obj.get_type()
+        if object_type == GameObjects.ObjectType.UNIT:
+            node_id = tile.get_node_id()
+            self._units_by_node[node_id].remove(game_obj)
+            self._unit_counts[node_id] -= 1
+            if self._unit_counts[node_id] == 0:
+                self._invalidate_placement_cache()
+            for watcher in self._tile_watchers[node_id]:
+                watcher.unit_left_range(game_obj)
+        elif object_type == GameObjects.ObjectType.TOWER:
+            self.unwatch_tiles(game_obj)
+            node_id = tile.get_node_id()
+            self._tower_counts[node_id] -= 1
+            if self._tower_counts[node_id] == 0:
+                self.update_tile_occupancy(tile)
+
+    def get_neighbor_ids(self):
+        return self._neighbor_ids
+
+    def get_tile_by_id(self, node_id):
+        return self._tiles_by_id[node_id]
+
+    def get_tile_size(self):
+        return self._tile_width, self._tile_height
+
+    def get_node_ids_in_range(self, tile, distance):
+        offset_i, offset_j = get_range_stencil(distance, self.get_tile_size())
+        i0, j0 = tile.get_grid_loc()
+        i = offset_i + i0
+        j = offset_j + j0
+        in_grid = (i >= 0) & (i < self._cols) & (j >= 0) & (j < self._rows)
+        return i[in_grid] * self._rows + j[in_grid]
+
+    def get_tiles_in_range(self, tile, distance):
+        tiles_by_id = self._tiles_by_id
+        return [tiles_by_id[node_id] for node_id in self.get_node_ids_in_range(tile, distance).tolist()]
+
+    def get_next_tile(self, tile):
+        next_node = self._exit_field.next_nodes[tile.get_node_id()]
+        if next_node == PathFinding.NO_NODE:
             return None
-        while previous_node:
-            tile_list.append(previous_node)
-            previous_node = previous_nodes[previous_node]
+        return self._tiles_by_id[next_node]
 
-        return tile_list
+    def get_tile_centers(self):
+        return self._tile_centers
 
-    def update_shortest_path_cache(self):
-        _, previous_nodes, unreachable_nodes = Math.pseudo_dijkstra(self.get_tiles_flatten_list(), self._enter_tile)
-        if self._exit_tile in unreachable_nodes:
-            # print('could not reach exit...')
-            return False
+    def get_next_node_array(self):
+        return self._exit_field.get_next_node_array()
 
-        self._shortest_path_cache = previous_nodes
-        return True
+    def get_distance_to_exit(self, tile):
+        return self._exit_field.distances[tile.get_node_id()]
 
-    def test_for_valid_path(self, negate_tiles=None):
-        tile_list = self.get_tiles_flatten_list()
-        if negate_tiles is not None:
-            for t in negate_tiles:
-                tile_list.remove(t)
-        _, previous_nodes, unreachable_nodes = Math.pseudo_dijkstra(tile_list, self._enter_tile)
-        if self._exit_tile in unreachable_nodes:
-            # print('could not reach exit...')
-            return False
-        return True
+    def get_path_update_relaxed_count(self):
+        return self._exit_field.relaxed_count
 
-    def debug_verify_objects(self):
-        for i in range(len(self._tiles)):
-            for j in range(len(self._tiles[i])):
-                tile = self._tiles[i][j]
-                for game_obj in tile.debug_get_objects():
-                    if game_obj.debug_get_tile() != self._tiles[i][j]:
-                        print("err: err game tile")
-                        print("     " + str(game_obj))
-                        print("     " + str(self))
+    def has_path_to_exit(self):
+        distances = self._exit_field.distances
+        return all(distances[tile.get_node_id()] != PathFinding.UNREACHABLE for tile in self._enter_tiles)
+
+    def update_shortest_path_cache(self):
+        # Distance field computed backwards from the exit tiles, shared by every unit
+        exit_ids = [tile.get_node_id() for tile in self._exit_tiles]
+        if self._weighted_tile_count > 0:
+            self._exit_field = PathFinding.DistanceField(self._neighbor_ids, self.get_blocked_nodes(), exit_ids, self._tile_costs)
+        elif Defaults.FLOW_FIELD:
+            self._exit_field = PathFinding.FlowField(self._neighbor_ids, self._cols, self._rows, self.get_blocked_nodes(), exit_ids)
+        else:
+            self._exit_field = PathFinding.DistanceField(self._neighbor_ids, self.get_blocked_nodes(), exit_ids)
+        self._invalidate_placement_cache()
+        self._invalidate_paths()
+        return self.has_path_to_exit()
+
+    def update_tile_occupancy(self, tile):
+        # Only repairs the part of the exit field affected by tile
+        self._exit_field.set_blocked(tile.get_node_id(), tile.is_occupied())
+        self._invalidate_placement_cache()
+        self._invalidate_paths()
+        return self.has_path_to_exit()
+
+    def _invalidate_placement_cache(self):
+        self._separating_nodes = None
+        self._placeable_tiles = None
+
+    def _invalidate_paths(self):
+        self._path_version += 1
+        self._path_cache = {}
+
+    def _get_separating_nodes(self):
+        if self._separating_nodes is None:
+            # Blocking a node must leave every enter tile and every tile holding a unit a path to some exit tile
+            sources = [tile.get_node_id() for tile in self._enter_tiles]
+            sources += np.flatnonzero(self._unit_count_array).tolist()
+            if len(self._exit_tiles) == 1:
+                self._separating_nodes = PathFinding.separating_nodes(self._neighbor_ids, self.get_blocked_nodes(), sources, self._exit_tile.get_node_id())
+            else:
+                neighbor_ids, blocked, virtual = PathFinding.add_virtual_target(self._neighbor_ids, self.get_blocked_nodes(), [t.get_node_id() for t in self._exit_tiles])
+                separating = PathFinding.separating_nodes(neighbor_ids, blocked, sources, virtual)[:-1]
+                for tile in self._exit_tiles:
+                    separating[tile.get_node_id()] = 1
+                self._separating_nodes = separating
+        return self._separating_nodes
 
     def can_place_tower(self, tile):
         if tile.is_occupied():
             return False
-        if not self.test_for_valid_path(negate_tiles=[tile]):
+        if self._get_separating_nodes()[tile.get_node_id()]:
             return False
         return True
 
-    def remove_all_obj(self, tile):
-        was_occupied = tile.is_occupied()
-
-        tile.game_objects.clear()
+    def get_placeable_tiles(self):
+        if self._placeable_tiles is None:
+            self._placeable_tiles = [tile for tile in self._tiles_by_id if self.can_place_tower(tile)]
+        return self._placeable_tiles
 
-        if was_occupied != tile.is_occupied():
-            self.update_shortest_path_cache()
+    def remove_all_obj(self, tile):
+        for game_obj in list(tile.debug_get_objects()):
+            tile.remove_object(game_obj)
 
         return True
 
@@ -298,27 +594,32 @@ class Grid:
             return True
         return False
 
+    def get_closest_tile_index(self, loc):
+        # Tiles are uniform, so the closest tile center is the closest column center and row center. Points on the
+        # border between two tiles go to the lower index and points outside of the grid clamp to the closest edge tile.
+        i = closest_center_index(self._column_centers, loc[0], (loc[0] - self._location[0]) / self._tile_width)
+        j = closest_center_index(self._row_centers, loc[1], (loc[1] - self._location[1]) / self._tile_height)
+        return i, j
+
     def get_closest_tile(self, loc, b_within_grid=True):
-        # TODO: optimize
-        x, y = loc
         if self._tiles is None:
             return None
-        if b_within_grid:
-            grid_bounds = self.get_grid_bounds()
-            if x < grid_bounds[0][0] or x > grid_bounds[1][0] or y < grid_bounds[0][1] or y > grid_bounds[1][1]:
-                return None
-        closest_tile = self._tiles[0][0]
-        loc = closest_tile.get_center_location()
-        lowest_dist = (loc[0]-x)*(loc[0]-x) + (loc[1]-y)*(loc[1]-y)
-
-        for tiles in self._tiles:
-            for tile in tiles:
-                loc = tile.get_center_location()
-                dist = (loc[0]-x)*(loc[0]-x) + (loc[1]-y) * (loc[1]-y)
-                if dist < lowest_dist:
-                    closest_tile = tile
-                    lowest_dist = dist
-        return closest_tile
+        if b_within_grid and not self.in_bounds(loc):
+            return None
+        i, j = self.get_closest_tile_index(loc)
+        return self._tiles[i][j]
+
+    def get_tile_containing(self, loc):
+        # For projectiles / units, which tile a point in the grid is on
+        return self.get_closest_tile(loc, b_within_grid=False)
+
+    def get_node_ids_containing(self, locations):
+        # Vectorized get_tile_containing for an (n, 2) array of locations
+        x = locations[:, 0]
+        y = locations[:, 1]
+        i = closest_center_indices(self._column_center_array, x, (x - self._location[0]) / self._tile_width)
+        j = closest_center_indices(self._row_center_array, y, (y - self._location[1]) / self._tile_height)
+        return i * self._rows + j
 
     def get_tiles_flatten_list(self):
         tiles = []
@@ -0,0 +1,106 @@
+from enum import Enum
+import logging
+
+import GameObjects as GameObjects
+
+logger = logging.getLogger("prototype_td.invariants")
+
+
+class CheckLevel(Enum):
+    OFF = "off"
+    SAMPLED = "sampled"  # objects that changed tile every tick, everything every full_check_ticks
+    FULL = "full"  # everything every tick
+
+
+class InvariantChecker:
+    # Verifies that objects, tiles, the grid occupancy indexes and the GameObjectManager agree with each other.
+    # Tile changes are reported by the grid (Grid.set_tile_listener) so the incremental check only looks at objects
+    # that moved since the last tick. Violations go to the "prototype_td.invariants" logger with the details as
+    # structured fields (record.invariant, record.tick, record.object, record.tile).
+    def __init__(self, grid, gom, level=CheckLevel.SAMPLED, full_check_ticks=60):
+        self._grid = grid
+        self._gom = gom
+        self._level = None
+        self._full_check_ticks = full_check_ticks
+        self._tick = 0
+        self._moved_objects = {}  # objects whose tile changed since the last check (dict as an ordered set)
+        self.violation_count = 0
+        self.set_level(level)
+
+    def get_level(self):
+        return self._level
+
+    def set_level(self, level):
+        self._level = level
+        self._moved_objects = {}
+        if level == CheckLevel.SAMPLED:
+            self._grid.set_tile_listener(self.object_moved)
+        else:
+            self._grid.set_tile_listener(None)
+
+    def object_moved(self, tile, game_object):
+        self._moved_objects[game_object] = None
+
+    def report(self, invariant, game_object=None, tile=None):
+        self.violation_count += 1
+        grid_loc = tile.get_grid_loc() if tile is not None else None
+        logger.error("invariant violated: %s, tick %d, object %r, tile %s", invariant, self._tick, game_object, grid_loc,
+                     extra={"invariant": invariant, "tick": self._tick, "object": repr(game_object), "tile": grid_loc})
+
+    def tick(self):
+        # Once per gameplay tick, after the objects ticked
+        self._tick += 1
+        if self._level == CheckLevel.OFF:
+            return
+        if self._level == CheckLevel.FULL or self._tick % self._full_check_ticks == 0:
+            self._moved_objects = {}
+            self.check_all()
+        elif self._moved_objects:
+            moved_objects = self._moved_objects
+            self._moved_objects = {}
+            for game_object in moved_objects:
+                self.check_object(game_object)
+
+    def check_object(self, game_object):
+        # Objects removed from the game since they moved are not checked
+        if not self._gom.contains(game_object):
+            return
+        tile = game_object.debug_get_tile()
+        if tile is None:
+            return
+        if game_object not in tile.debug_get_objects():
+            self.report("object missing from its tile", game_object, tile)
+        self.check_tile(tile)
+
+    def check_tile(self, tile):
+        towers = 0
+        units = []
+        for game_object in tile.debug_get_objects():
+            if game_object.debug_get_tile() is not tile:
+                self.report("tile holds an object that points at another tile", game_object, tile)
+            object_type = game_object.get_type()
+            if object_type == GameObjects.ObjectType.TOWER:
+                towers += 1
+            elif object_type == GameObjects.ObjectType.UNIT:
+                units.append(game_object)
+
+        node_id = tile.get_node_id()
+        if self._grid.get_tower_counts()[node_id] != towers:
+            self.report("grid tower count out of date", None, tile)
+        if self._grid.get_units_by_node()[node_id] != units:
+            self.report("grid unit index out of date", None, tile)
+
+    def check_all(self):
+        placed = {}  # object : tile it is on
+        for tile in self._grid.get_tiles_flatten_list():
+            self.check_tile(tile)
+            for game_object in tile.debug_get_objects():
+                placed[game_object] = tile
+                if not self._gom.contains(game_object):
+                    self.report("tile holds an object that is not managed (leaked)", game_object, tile)
+
+        for object_type in GameObjects.ObjectType:
+            for game_object in self._gom.get_objects_of_type(object_type):
+                tile = game_object.debug_get_tile()
+                if tile is not None and placed.get(game_object) is not tile:
+                    self.report("object missing from its tile", game_object, tile)
@@ -0,0 +1,68 @@
+class ObjectPool:
+    # Free list of one game object type. acquire() resets a released object (object.reset takes the constructor's
+    # arguments) instead of constructing a new one. Released objects only become reusable after recycle(), called once
+    # per gameplay tick, so an object released mid-tick can't come back while the tick is still iterating a snapshot
+    # that holds it.
+    def __init__(self, object_type):
+        self._object_type = object_type
+        self._free = []
+        self._released = []  # released this tick, moved to _free by recycle
+        self.created = 0  # objects are only created with an empty free list, so this is also the peak in use
+        self.reused = 0
+
+    def acquire(self, **kwargs):
+        free = self._free
+        if free:
+            game_object = free.pop()
+            game_object.reset(**kwargs)
+            self.reused += 1
+            return game_object
+        self.created += 1
+        return self._object_type(**kwargs)
+
+    def release(self, game_object):
+        self._released.append(game_object)
+
+    def recycle(self):
+        if self._released:
+            self._free += self._released
+            self._released = []
+
+    def get_free_count(self):
+        return len(self._free) + len(self._released)
+
+    def get_stats(self):
+        free = self.get_free_count()
+        return {"in_use": self.created - free, "free": free, "created": self.created, "reused": self.reused}
+
+
+class ObjectPools:
+    # One ObjectPool per type, created on first use
+    def __init__(self):
+        self._pools = {}
+
+    def get_pool(self, object_type):
+        pool = self._pools.get(object_type)
+        if pool is None:
+            pool = ObjectPool(object_type)
+            self._pools[object_type] = pool
+        return pool
+
+    def acquire(self, object_type, **kwargs):
+        pool = self._pools.get(object_type)
+        if pool is None:
+            pool = self.get_pool(object_type)
+        return pool.acquire(**kwargs)
+
+    def release(self, game_object):
+        pool = self._pools.get(type(game_object))
+        if pool is None:
+            pool = self.get_pool(type(game_object))
+        pool.release(game_object)
+
+    def recycle(self):
+        for pool in self._pools.values():
+            pool.recycle()
+
+    def get_stats(self):
+        return {object_type.__name__: pool.get_stats() for object_type, pool in self._pools.items()}
@@ -0,0 +1,434 @@
+from collections import deque
+import heapq
+import numpy as np
+
+NO_NODE = -1
+UNREACHABLE = -1
+
+
+# All path functions work on integer node ids (Tile._node_id). neighbor_ids[n] is a sequence of the node ids linked
+# to n and blocked[n] is truthy when n can not be walked on. Every edge costs 1, so a FIFO queue (BFS) gives the same
+# distances as dijkstra without a heap. The weighted_* / a_star variants take costs[n] (integer >= 1), the cost of
+# stepping onto n (Grid.get_tile_costs), and use a heap.
+
+def multi_source_shortest_paths(neighbor_ids, blocked, sources):
+    # Distance to whichever of sources is closest and the previous node towards it, for every node. One BFS seeded
+    # with all of them (blocked sources are skipped). Ties between equal length routes go to the neighbor reached first
+    # (FIFO order), which is what the exit fields units follow are built with.
+    node_count = len(neighbor_ids)
+    distances = [UNREACHABLE] * node_count
+    previous_nodes = [NO_NODE] * node_count
+    queue = deque()
+    for source in sources:
+        if not blocked[source] and distances[source] == UNREACHABLE:
+            distances[source] = 0
+            queue.append(source)
+
+    pop = queue.popleft
+    push = queue.append
+    while queue:
+        u = pop()
+        alt = distances[u] + 1
+        for v in neighbor_ids[u]:
+            if distances[v] == UNREACHABLE and not blocked[v]:
+                distances[v] = alt
+                previous_nodes[v] = u
+                push(v)
+
+    return distances, previous_nodes
+
+
+def a_star(neighbor_ids, blocked, costs, source, target, rows, min_cost=1):
+    # Point to point weighted path, returned target first (same as follow_next_nodes) or None. The heuristic is the
+    # manhattan distance on the Grid layout (node id = column * rows + row) times min_cost, the lowest value in costs,
+    # which keeps it admissible. Returns (path, cost, expanded node count). Like follow_next_nodes there is no path
+    # from a node to itself (None, cost 0).
+    if blocked[source] or blocked[target]:
+        return None, UNREACHABLE, 0
+    if source == target:
+        return None, 0, 0
+    target_col, target_row = divmod(target, rows)
+
+    node_count = len(neighbor_ids)
+    distances = [UNREACHABLE] * node_count
+    previous_nodes = [NO_NODE] * node_count
+    distances[source] = 0
+    col, row = divmod(source, rows)
+    heap = [((abs(col - target_col) + abs(row - target_row)) * min_cost, 0, source)]
+    pop = heapq.heappop
+    push = heapq.heappush
+    expanded = 0
+    while heap:
+        _, dist_u, u = pop(heap)
+        if dist_u != distances[u]:
+            continue
+        expanded += 1
+        if u == target:
+            path = [target]
+            while previous_nodes[path[-1]] != NO_NODE:
+                path.append(previous_nodes[path[-1]])
+            return path, dist_u, expanded
+        for v in neighbor_ids[u]:
+            alt = dist_u + costs[v]
+            dist_v = distances[v]
+            if (dist_v == UNREACHABLE or alt < dist_v) and not blocked[v]:
+                distances[v] = alt
+                previous_nodes[v] = u
+                col, row = divmod(v, rows)
+                push(heap, (alt + (abs(col - target_col) + abs(row - target_row)) * min_cost, alt, v))
+
+    return None, UNREACHABLE, expanded
+
+
+def distance_field(neighbor_ids, blocked, targets):
+    # Distance to the nearest of targets and the next node towards it, for every node. Since edges are undirected the
+    # BFS predecessors from the targets are the next hops. Blocked nodes get their closest reachable neighbor so
+    # anything standing on a node that was just blocked can still walk off of it.
+    distances, next_nodes = multi_source_shortest_paths(neighbor_ids, blocked, targets)
+    for node in [n for n, is_blocked in enumerate(blocked) if is_blocked]:
+        best = UNREACHABLE
+        for v in neighbor_ids[node]:
+            dist_v = distances[v]
+            if dist_v != UNREACHABLE and (best == UNREACHABLE or dist_v < best):
+                best = dist_v
+                next_nodes[node] = v
+    return distances, next_nodes
+
+
+def weighted_distance_field(neighbor_ids, blocked, costs, targets):
+    # distance_field with costs towards the nearest of targets, dijkstra seeded with every target. The distance of a
+    # node is the cost of every node stepped onto on the way, so a node's next node is the neighbor u minimizing
+    # distances[u] + costs[u].
+    node_count = len(neighbor_ids)
+    distances = [UNREACHABLE] * node_count
+    next_nodes = [NO_NODE] * node_count
+    heap = []
+    for target in targets:
+        if not blocked[target]:
+            distances[target] = 0
+            heap.append((0, target))
+    pop = heapq.heappop
+    push = heapq.heappush
+    while heap:
+        dist_u, u = pop(heap)
+        if dist_u != distances[u]:
+            continue
+        alt = dist_u + costs[u]
+        for v in neighbor_ids[u]:
+            if not blocked[v] and (distances[v] == UNREACHABLE or alt < distances[v]):
+                distances[v] = alt
+                next_nodes[v] = u
+                push(heap, (alt, v))
+
+    for node in [n for n, is_blocked in enumerate(blocked) if is_blocked]:
+        best = UNREACHABLE
+        for v in neighbor_ids[node]:
+            dist_v = distances[v]
+            if dist_v != UNREACHABLE and (best == UNREACHABLE or dist_v + costs[v] < best):
+                best = dist_v + costs[v]
+                next_nodes[node] = v
+    return distances, next_nodes
+
+
+def flow_field(neighbor_ids, blocked, cols, rows, targets):
+    # distance_field towards the nearest of any number of targets, on a cols x rows 4-connected grid (node id =
+    # column * rows + row, the Grid layout). Distances come from the multi source BFS, only the next node step is
+    # vectorized. Returns numpy distances and next nodes.
+    distances = np.array(multi_source_shortest_paths(neighbor_ids, blocked, targets)[0], dtype=np.int32).reshape(cols, rows)
+
+    # Next node is the neighbor (left, right, up, down) closest to a target, unreachable neighbors sort last
+    far = np.iinfo(np.int32).max
+    padded = np.full((cols + 2, rows + 2), far, dtype=np.int32)
+    padded[1:-1, 1:-1] = np.where(distances == UNREACHABLE, far, distances)
+    neighbor_distances = np.stack([padded[:-2, 1:-1], padded[2:, 1:-1], padded[1:-1, :-2], padded[1:-1, 2:]])
+    direction = neighbor_distances.argmin(axis=0)
+    closest = np.take_along_axis(neighbor_distances, direction[None], axis=0)[0]
+    offsets = np.array([-rows, rows, -1, 1], dtype=np.intp)
+    next_nodes = np.arange(cols * rows, dtype=np.intp).reshape(cols, rows) + offsets[direction]
+    # Same as distance_field: targets and nodes cut off from every target have none, blocked nodes point off of themselves
+    next_nodes[(closest == far) | (distances == 0)] = NO_NODE
+    return distances.ravel(), next_nodes.ravel()
+
+
+def follow_next_nodes(next_nodes, source, target=None):
+    # Path from source to target along a distance_field, returned target first (same order as Grid.get_shortest_path).
+    # Without a target the path ends wherever the field does (the nearest of several targets).
+    if source == target or next_nodes[source] == NO_NODE:
+        return None
+    path = [source]
+    node = next_nodes[source]
+    while node != target:
+        if node == NO_NODE:
+            if target is None:
+                break
+            return None
+        path.append(node)
+        node = next_nodes[node]
+    else:
+        path.append(target)
+    path.reverse()
+    return path
+
+
+def add_virtual_target(neighbor_ids, blocked, targets):
+    # Copies of neighbor_ids / blocked with one extra node linked to every target, so single target searches
+    # (separating_nodes) answer "any of targets". Returns (neighbor_ids, blocked, virtual node id)
+    virtual = len(neighbor_ids)
+    neighbor_ids = list(neighbor_ids)
+    for target in targets:
+        neighbor_ids[target] = tuple(neighbor_ids[target]) + (virtual,)
+    neighbor_ids.append(tuple(targets))
+    blocked = bytearray(blocked)
+    blocked.append(0)
+    return neighbor_ids, blocked, virtual
+
+
+def separating_nodes(neighbor_ids, blocked, sources, target):
+    # separating[n] is set when blocking n disconnects any of sources from target (articulation points between them,
+    # plus sources and target themselves). Every node is separating if a source is already disconnected.
+    node_count = len(neighbor_ids)
+    if blocked[target] or any(blocked[source] for source in sources):
+        return bytearray(b"\x01") * node_count
+
+    # Iterative tarjan DFS rooted at target, disc is the discovery order (0 = not visited) and low the lowest disc
+    # reachable through a back edge from the subtree. has_source is set on nodes with a source in their subtree.
+    disc = [0] * node_count
+    low = [0] * node_count
+    parent = [NO_NODE] * node_count
+    has_source = bytearray(node_count)
+    for source in sources:
+        has_source[source] = 1
+    separating = bytearray(node_count)
+    counter = 1
+    disc[target] = low[target] = counter
+    stack = [(target, iter(neighbor_ids[target]))]
+    while stack:
+        u, neighbors = stack[-1]
+        for v in neighbors:
+            if blocked[v]:
+                continue
+            if disc[v] == 0:
+                counter += 1
+                disc[v] = low[v] = counter
+                parent[v] = u
+                stack.append((v, iter(neighbor_ids[v])))
+                break
+            elif v != parent[u] and disc[v] < low[u]:
+                low[u] = disc[v]
+        else:
+            stack.pop()
+            p = parent[u]
+            if p == NO_NODE:
+                continue
+            if low[u] < low[p]:
+                low[p] = low[u]
+            if has_source[u]:
+                has_source[p] = 1
+                # Without p the subtree of u, and the source in it, only reaches target through p
+                if low[u] >= disc[p]:
+                    separating[p] = 1
+
+    if any(disc[source] == 0 for source in sources):
+        return bytearray(b"\x01") * node_count
+
+    for source in sources:
+        separating[source] = 1
+    separating[target] = 1
+    return separating
+
+
+class DistanceField:
+    # distance_field that is repaired incrementally when a single node is blocked or unblocked. Blocking only touches
+    # the subtree of shortest path tree behind the node (dynamic SSSP / LPA* style), unblocking only the nodes that get
+    # closer to a target. With costs it is a weighted_distance_field repaired the same way. relaxed_count is the number
+    # of nodes touched by the last update.
+    def __init__(self, neighbor_ids, blocked, targets, costs=None):
+        self._neighbor_ids = neighbor_ids
+        self._blocked = bytearray(blocked)
+        self._targets = list(targets)
+        self._weighted = costs is not None
+        self._costs = costs if costs is not None else [1] * len(neighbor_ids)
+        self.distances = []
+        self.next_nodes = []
+        self.relaxed_count = 0
+        self.version = 0  # bumped on every change, for caches derived from the field
+        self._next_node_array = None
+        self._next_node_array_version = None
+        self.rebuild()
+
+    def rebuild(self):
+        if self._weighted:
+            self.distances, self.next_nodes = weighted_distance_field(self._neighbor_ids, self._blocked, self._costs, self._targets)
+        else:
+            self.distances, self.next_nodes = distance_field(self._neighbor_ids, self._blocked, self._targets)
+        self.relaxed_count = len(self._neighbor_ids)
+        self.version += 1
+
+    def get_next_node_array(self):
+        # numpy copy of next_nodes for vectorized readers, only rebuilt when the field changed
+        if self._next_node_array_version != self.version:
+            self._next_node_array = np.array(self.next_nodes, dtype=np.intp)
+            self._next_node_array_version = self.version
+        return self._next_node_array
+
+    def set_blocked(self, node, blocked):
+        if bool(self._blocked[node]) == bool(blocked):
+            self.relaxed_count = 0
+            return
+        self._blocked[node] = blocked
+        self.version += 1
+        if node in self._targets:
+            self.rebuild()
+        elif blocked:
+            self._block(node)
+        else:
+            self._unblock(node)
+
+    def _update_blocked_next_node(self, node):
+        distances = self.distances
+        costs = self._costs
+        best = UNREACHABLE
+        self.next_nodes[node] = NO_NODE
+        for v in self._neighbor_ids[node]:
+            dist_v = distances[v]
+            if not self._blocked[v] and dist_v != UNREACHABLE and (best == UNREACHABLE or dist_v + costs[v] < best):
+                best = dist_v + costs[v]
+                self.next_nodes[node] = v
+
+    def _update_blocked_neighbors(self, nodes):
+        blocked = self._blocked
+        for node in nodes:
+            for v in self._neighbor_ids[node]:
+                if blocked[v]:
+                    self._update_blocked_next_node(v)
+
+    def _block(self, node):
+        neighbor_ids = self._neighbor_ids
+        blocked = self._blocked
+        costs = self._costs
+        distances = self.distances
+        next_nodes = self.next_nodes
+
+        if distances[node] == UNREACHABLE:
+            self._update_blocked_next_node(node)
+            self.relaxed_count = 1
+            return
+
+        # Everything whose path to the target went through node loses its distance
+        subtree = [node]
+        for u in subtree:
+            for v in neighbor_ids[u]:
+                if next_nodes[v] == u and not blocked[v]:
+                    subtree.append(v)
+        for u in subtree:
+            distances[u] = UNREACHABLE
+            next_nodes[u] = NO_NODE
+
+        # Seed the subtree from its border with the rest of the tree, then dijkstra inside of it
+        heap = []
+        for u in subtree:
+            if blocked[u]:
+                continue
+            for v in neighbor_ids[u]:
+                dist_v = distances[v]
+                if dist_v != UNREACHABLE and not blocked[v] and (distances[u] == UNREACHABLE or dist_v + costs[v] < distances[u]):
+                    distances[u] = dist_v + costs[v]
+                    next_nodes[u] = v
+            if distances[u] != UNREACHABLE:
+                heap.append((distances[u], u))
+        heapq.heapify(heap)
+
+        relaxed_count = len(subtree)
+        while heap:
+            dist_u, u = heapq.heappop(heap)
+            if dist_u != distances[u]:
+                continue
+            relaxed_count += 1
+            alt = dist_u + costs[u]
+            for v in neighbor_ids[u]:
+                if not blocked[v] and (distances[v] == UNREACHABLE or alt < distances[v]):
+                    distances[v] = alt
+                    next_nodes[v] = u
+                    heapq.heappush(heap, (alt, v))
+
+        self._update_blocked_next_node(node)
+        self._update_blocked_neighbors(subtree)
+        self.relaxed_count = relaxed_count
+
+    def _unblock(self, node):
+        neighbor_ids = self._neighbor_ids
+        blocked = self._blocked
+        distances = self.distances
+        next_nodes = self.next_nodes
+
+        # next_nodes[node] already points at its closest reachable neighbor (see distance_field)
+        if next_nodes[node] == NO_NODE:
+            self.relaxed_count = 1
+            return
+        distances[node] = distances[next_nodes[node]] + self._costs[next_nodes[node]]
+
+        changed = [node]
+        if self._weighted:
+            # Single seed, dijkstra from it until no neighbor gets closer
+            costs = self._costs
+            heap = [(distances[node], node)]
+            while heap:
+                dist_u, u = heapq.heappop(heap)
+                if dist_u != distances[u]:
+                    continue
+                alt = dist_u + costs[u]
+                for v in neighbor_ids[u]:
+                    if not blocked[v] and (distances[v] == UNREACHABLE or alt < distances[v]):
+                        distances[v] = alt
+                        next_nodes[v] = u
+                        changed.append(v)
+                        heapq.heappush(heap, (alt, v))
+        else:
+            # Single seed with unit costs, FIFO order settles every node the first time it is improved
+            queue = deque(changed)
+            while queue:
+                u = queue.popleft()
+                alt = distances[u] + 1
+                for v in neighbor_ids[u]:
+                    if not blocked[v] and (distances[v] == UNREACHABLE or alt < distances[v]):
+                        distances[v] = alt
+                        next_nodes[v] = u
+                        changed.append(v)
+                        queue.append(v)
+
+        self._update_blocked_neighbors(changed)
+        self.relaxed_count = len(changed)
+
+
+class FlowField:
+    # DistanceField interface rebuilt with flow_field whenever a node changes, for readers that want the numpy field
+    # straight from the vectorized next node step. distances / next_nodes are lists for per tile lookups.
+    def __init__(self, neighbor_ids, cols, rows, blocked, targets):
+        self._neighbor_ids = neighbor_ids
+        self._cols = cols
+        self._rows = rows
+        self._blocked = bytearray(blocked)
+        self._targets = list(targets)
+        self.distances = []
+        self.next_nodes = []
+        self._next_node_array = None
+        self.relaxed_count = 0
+        self.version = 0
+        self.rebuild()
+
+    def rebuild(self):
+        distances, self._next_node_array = flow_field(self._neighbor_ids, self._blocked, self._cols, self._rows, self._targets)
+        self.distances = distances.tolist()
+        self.next_nodes = self._next_node_array.tolist()
+        self.relaxed_count = len(self._blocked)
+        self.version += 1
+
+    def set_blocked(self, node, blocked):
+        if bool(self._blocked[node]) == bool(blocked):
+            self.relaxed_count = 0
+            return
+        self._blocked[node] = blocked
+        self.rebuild()
+
+    def get_next_node_array(self):
+        return self._next_node_array
@@ -0,0 +1,132 @@
+import csv
+import json
+import time
+
+from collections import deque
+
+
+def percentile(sorted_samples, p):
+    # Nearest rank on an already sorted list
+    if len(sorted_samples) == 0:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(p / 100.0 * len(sorted_samples)))]
+
+
+class Timer:
+    # Call count and total over the whole run, percentiles over the last window samples
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def get_summary(self):
+        samples = sorted(self.samples)
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count > 0 else 0.0,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+            "max": self.max,
+        }
+
+
+class Profiler:
+    # Timers are attached by replacing a method (or module function) with a timed wrapper, see instrument. Nothing is
+    # wrapped unless a Profiler is created, so a disabled profiler costs nothing in the game loop.
+    def __init__(self, window=600):
+        self._window = window
+        self._timers = {}
+        self._counters = {}
+        self._gauges = {}  # name : [last, peak]
+        self._instrumented = []  # (obj, name, original, was_instance_attribute)
+
+    def get_timer(self, name):
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = Timer(self._window)
+            self._timers[name] = timer
+        return timer
+
+    def count(self, name, amount=1):
+        self._counters[name] = self._counters.get(name, 0) + amount
+
+    def set_counter(self, name, value):
+        self._counters[name] = value
+
+    def set_gauge(self, name, value):
+        gauge = self._gauges.get(name)
+        if gauge is None:
+            self._gauges[name] = [value, value]
+        else:
+            gauge[0] = value
+            if value > gauge[1]:
+                gauge[1] = value
+
+    def instrument(self, obj, method_name, timer_name=None, after=None):
+        # Times every call of obj.method_name, after(result) is called with the return value when given
+        original = getattr(obj, method_name)
+        timer = self.get_timer(timer_name or method_name)
+        add = timer.add
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = original(*args, **kwargs)
+            add(perf_counter() - start)
+            if after is not None:
+                after(result)
+            return result
+
+        was_instance_attribute = method_name in getattr(obj, "__dict__", {})
+        self._instrumented.append((obj, method_name, original, was_instance_attribute))
+        setattr(obj, method_name, timed)
+
+    def uninstrument(self):
+        for obj, method_name, original, was_instance_attribute in reversed(self._instrumented):
+            if was_instance_attribute:
+                setattr(obj, method_name, original)
+            else:
+                delattr(obj, method_name)
+        self._instrumented = []
+
+    def get_report(self):
+        return {
+            "timers": {name: timer.get_summary() for name, timer in self._timers.items()},
+            "counters": dict(self._counters),
+            "gauges": {name: {"last": last, "peak": peak} for name, (last, peak) in self._gauges.items()},
+        }
+
+    def get_overlay_lines(self):
+        lines = []
+        for name, timer in self._timers.items():
+            if timer.count == 0:
+                continue
+            summary = timer.get_summary()
+            lines.append("{} {:.2f}/{:.2f}/{:.2f} ms".format(name, summary["p50"] * 1000, summary["p95"] * 1000, summary["p99"] * 1000))
+        for name, value in self._counters.items():
+            lines.append("{} {}".format(name, value))
+        for name, (last, peak) in self._gauges.items():
+            lines.append("{} {} (peak {})".format(name, last, peak))
+        return lines
+
+    def dump(self, path):
+        # path.json with the full report and path.csv with one row per timer (seconds)
+        report = self.get_report()
+        with open(path + ".json", "w") as f:
+            json.dump(report, f, indent=2)
+        with open(path + ".csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "count", "total", "mean", "p50", "p95", "p99", "max"])
+            for name, summary in report["timers"].items():
+                writer.writerow([name] + [summary[k] for k in ["count", "total", "mean", "p50", "p95", "p99", "max"]])
+        return report
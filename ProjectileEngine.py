@@ -0,0 +1,117 @@
+import math
+import numpy as np
+
+import DrawUtils as DrawUtils
+import GameObjects as GameObjects
+
+from DrawUtils import Colors
+from DrawUtils import Shapes
+
+
+class ProjectilePool(GameObjects.GameObject):
+    # Every live projectile on a grid in contiguous arrays, moved and hit tested in one vectorized pass per tick.
+    # Projectiles are slots instead of GameObjects, dead slots are reused without touching the GameObjectManager.
+    def __init__(self, grid, capacity=256):
+        GameObjects.GameObject.__init__(self, visible=True)
+        self._object_type = GameObjects.ObjectType.BATCH
+        self._grid = grid
+        self._color = Colors.BLUE
+        self._size = 5
+
+        self._centers = np.zeros((capacity, 2), dtype=np.float64)
+        self._previous_centers = np.zeros((capacity, 2), dtype=np.float64)  # centers before the last gameplay tick
+        self._alpha = 1.0
+        self._velocities = np.zeros((capacity, 2), dtype=np.float64)
+        self._damages = np.zeros(capacity, dtype=np.float64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._fresh = np.zeros(capacity, dtype=bool)  # spawned this tick, first move is next tick like ProjectileBase
+        self._free_slots = list(range(capacity - 1, -1, -1))
+
+    def get_centers(self):
+        return self._centers[self._alive]
+
+    def get_projectile_count(self):
+        return len(self._alive) - len(self._free_slots)
+
+    def _grow(self):
+        capacity = len(self._alive)
+        for name in ["_centers", "_previous_centers", "_velocities", "_damages", "_alive", "_fresh"]:
+            old = getattr(self, name)
+            new = np.zeros((capacity * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self._free_slots += list(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def spawn(self, location, speed=10.0, damage=10, direction=(0, 1)):
+        # location is the top left like ProjectileBase
+        if len(self._free_slots) == 0:
+            self._grow()
+        slot = self._free_slots.pop()
+        self._centers[slot] = (location[0] + self._size/2, location[1] + self._size/2)
+        self._previous_centers[slot] = self._centers[slot]
+        self._damages[slot] = damage
+        self._velocities[slot] = (0, speed)
+        self._alive[slot] = True
+        self._fresh[slot] = True
+        self.set_direction(slot, direction)
+        return slot
+
+    def set_direction(self, slot, direction):
+        speed = math.hypot(*self._velocities[slot])
+        length = math.hypot(direction[0], direction[1])
+        if length == 0:
+            # Target on top of the spawn, keep heading the way it was going
+            return
+        self._velocities[slot] = (speed * direction[0] / length, speed * direction[1] / length)
+
+    def free(self, slots):
+        self._alive[slots] = False
+        self._fresh[slots] = False
+        self._free_slots += np.atleast_1d(slots).tolist()
+
+    def is_tickable(self):
+        return True
+
+    def get_tick_type(self):
+        # Tower spawns are queued into this tick and move with the other projectiles after units moved
+        return GameObjects.ObjectType.PROJECTILE
+
+    def visual_tick(self, alpha=1.0):
+        self._alpha = alpha
+
+    def gameplay_tick(self):
+        live = np.flatnonzero(self._alive & ~self._fresh)
+        self._fresh[:] = False
+        if live.size == 0:
+            return
+        self._previous_centers[live] = self._centers[live]
+
+        centers = self._centers[live] + self._velocities[live]
+
+        # Same bounds test as ProjectileBase, on the top left of the projectile
+        (x1, y1), (x2, y2) = self._grid.get_grid_bounds()
+        top_left = centers - self._size/2
+        in_bounds = (x1 <= top_left[:, 0]) & (top_left[:, 0] <= x2) & (y1 <= top_left[:, 1]) & (top_left[:, 1] <= y2)
+        self.free(live[~in_bounds])
+        live = live[in_bounds]
+        centers = centers[in_bounds]
+        self._centers[live] = centers
+
+        # Only projectiles over tiles with units need to go back to python, damage can kill units so one at a time
+        node_ids = self._grid.get_node_ids_containing(centers)
+        candidates = self._grid.get_unit_count_array()[node_ids] > 0
+        units_by_node = self._grid.get_units_by_node()
+        hits = []
+        for slot, node_id in zip(live[candidates].tolist(), node_ids[candidates].tolist()):
+            units = units_by_node[node_id]
+            if len(units) > 0:
+                units[0].take_damage(float(self._damages[slot]))
+                hits.append(slot)
+        if hits:
+            self.free(hits)
+
+    def get_sprites(self):
+        previous = self._previous_centers[self._alive]
+        centers = previous + (self._centers[self._alive] - previous) * self._alpha
+        surface, offset = DrawUtils.get_sprite(Shapes.CIRCLE, self._size, self._color)
+        return [(surface, (int(x) + offset[0], int(y) + offset[1])) for x, y in centers.tolist()]
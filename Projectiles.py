@@ -5,29 +5,37 @@ from DrawUtils import Colors
 
 
 class ProjectileBase(GameObjects.GameObject):
-    def __init__(self, speed=10.0, location=None, visible=False, tile=None, damage=10):
-        GameObjects.GameObject.__init__(self, location=location, visible=visible)
-        self._direction = [0, 1]
-        self._tile = tile
+    __slots__ = ("_destroy_event", "_direction", "_move_speed", "_damage", "_active")
+
+    def __init__(self, speed=10.0, location=None, visible=False, tile=None, damage=10, destroy_event=None):
+        GameObjects.GameObject.__init__(self)
         self._object_type = GameObjects.ObjectType.PROJECTILE
         self._color = Colors.BLUE
-        self._size = 5
+        self.set_shape(self._shape, 5)
+        ProjectileBase.reset(self, speed, location, visible, tile, damage, destroy_event)
+
+    def reset(self, speed=10.0, location=None, visible=False, tile=None, damage=10, destroy_event=None):
+        GameObjects.GameObject.reset(self, location, visible)
+        self._destroy_event = destroy_event
+        self._direction = [0, 1]
+        self._tile = tile
         self._move_speed = speed
         self._damage = damage
         self._active = False
-        self._prev_tile = None
 
     def initialize(self):
         self._tile.add_object(self)
         self._active = True
 
     def set_direction(self, new_direction):
+        if new_direction[0] == 0 and new_direction[1] == 0:
+            # Target on top of the spawn, keep heading the way it was going
+            return
         self._direction = Math.normalize(new_direction)
 
     def sample_direction(self, sample_direction):
         loc = self.get_center_location()
-        new_location = (loc[0] + self._move_speed * sample_direction[0], loc[1] + self._move_speed * sample_direction[1])
-        return new_location[0]-self._size/2, new_location[1]-self._size/2
+        return loc[0] + self._move_speed * sample_direction[0], loc[1] + self._move_speed * sample_direction[1]
 
     def attempt_hit(self):
         try:
@@ -39,31 +47,26 @@ class ProjectileBase(GameObjects.GameObject):
     def destroy_projectile(self):
         self._tile.remove_object(self)
         self._tile = None
-        self._visible = False
+        self.set_visible(False)
         self._active = False
+        if self._destroy_event is not None:
+            self._destroy_event(self)
 
     def gameplay_tick(self):
         if not self._active or self.get_location() is None or self._tile is None:
             return
 
-        # Sample potential location
-        new_location = self.sample_direction(self._direction)
+        # Sample potential center
+        new_center = self.sample_direction(self._direction)
+        self.set_center_location(new_center)
 
-        if not self._tile._grid.in_bounds(new_location):  # TODO: _grid
+        grid = self._tile.get_grid()
+        if not grid.in_bounds(self._location):
             self.destroy_projectile()
             return
 
-        self.set_location(new_location)
-
         # check if swapped tiles
-        shortest_tile_dist = Math.sq_dist(self.get_center_location(), self._tile.get_center_location())
-        closest_tile = self._tile
-        for tile in self._tile.get_neighbors():
-            tile_dist = Math.sq_dist(self.get_center_location(), tile.get_center_location())
-            if tile_dist < shortest_tile_dist:
-                shortest_tile_dist = tile_dist
-                closest_tile = tile
-
+        closest_tile = grid.get_tile_containing(new_center)
         if closest_tile != self._tile:
             self._tile.remove_object(self)
             self._tile = closest_tile
@@ -0,0 +1,159 @@
+import argparse
+from enum import IntEnum
+import os
+import struct
+import sys
+import time
+import zlib
+
+import Defaults as Defaults
+import GameObjects as GameObjects
+import GameState as GameState
+
+# File layout (little endian): header, action count + actions, hash count + one state hash per gameplay tick
+MAGIC = b"PTDR"
+VERSION = 1
+HEADER_FORMAT = "<4sHQB"  # magic, version, seed, flags
+ACTION_FORMAT = "<IBHH"  # tick, action, arg_a, arg_b
+COUNT_FORMAT = "<I"
+FLAG_BATCH_UNITS = 1
+FLAG_BATCH_PROJECTILES = 2
+FLAG_FLOW_FIELD = 4
+
+
+class Action(IntEnum):
+    # Every input that changes game state, see GameStuff.apply_action
+    PLACE_CARD = 0  # card slot, tile node id
+    REMOVE_TOWER = 1  # tile node id
+    START_ROUND = 2  # K_SPACE
+    SEND_UNIT = 3  # K_u
+
+
+def state_hash(game_stuff):
+    # crc32 of everything gameplay depends on, cheap enough to run every tick while recording / playing back
+    player_info = game_stuff.player_info
+    current_round = game_stuff.current_round
+    state = [game_stuff.ticks, player_info.health, player_info.gold, game_stuff.round_state.value, game_stuff.round_ticks,
+             current_round.round_number, current_round.prep_ticks, current_round.units_summoned, current_round.units_remaining,
+             [None if card is None else card.get_tower_type().__name__ for card in game_stuff.card_slots]]
+    gom = game_stuff.gom
+    for object_type in [GameObjects.ObjectType.TOWER, GameObjects.ObjectType.UNIT, GameObjects.ObjectType.PROJECTILE]:
+        for game_object in gom.get_objects_of_type(object_type):
+            tile = game_object.debug_get_tile()
+            state.append((object_type.value, game_object.get_location(), None if tile is None else tile.get_node_id()))
+        if object_type == GameObjects.ObjectType.UNIT:
+            state.append([float(u.get_health()) for u in gom.get_objects_of_type(object_type)])
+    if game_stuff.projectile_pool is not None:
+        state.append(game_stuff.projectile_pool.get_centers().tobytes())
+    return zlib.crc32(repr(state).encode())
+
+
+class ReplayRecorder:
+    def __init__(self, seed, batch_units=False, batch_projectiles=False, flow_field=False):
+        self.seed = seed
+        self.flags = (FLAG_BATCH_UNITS if batch_units else 0) | (FLAG_BATCH_PROJECTILES if batch_projectiles else 0) | (FLAG_FLOW_FIELD if flow_field else 0)
+        self.actions = []  # (tick, action, arg_a, arg_b)
+        self.hashes = []  # state hash after every gameplay tick
+
+    def record(self, tick, action, arg_a=0, arg_b=0):
+        self.actions.append((tick, action, arg_a, arg_b))
+
+    def end_tick(self, game_stuff):
+        self.hashes.append(state_hash(game_stuff))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.seed, self.flags))
+            f.write(struct.pack(COUNT_FORMAT, len(self.actions)))
+            for action in self.actions:
+                f.write(struct.pack(ACTION_FORMAT, *action))
+            f.write(struct.pack(COUNT_FORMAT, len(self.hashes)))
+            f.write(struct.pack("<{}I".format(len(self.hashes)), *self.hashes))
+
+
+def load(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, seed, flags = struct.unpack_from(HEADER_FORMAT, data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a version {} replay: {}".format(VERSION, path))
+    recorder = ReplayRecorder(seed, bool(flags & FLAG_BATCH_UNITS), bool(flags & FLAG_BATCH_PROJECTILES), bool(flags & FLAG_FLOW_FIELD))
+
+    offset = struct.calcsize(HEADER_FORMAT)
+    action_count, = struct.unpack_from(COUNT_FORMAT, data, offset)
+    offset += struct.calcsize(COUNT_FORMAT)
+    for tick, action, arg_a, arg_b in struct.iter_unpack(ACTION_FORMAT, data[offset:offset + action_count * struct.calcsize(ACTION_FORMAT)]):
+        recorder.record(tick, Action(action), arg_a, arg_b)
+    offset += action_count * struct.calcsize(ACTION_FORMAT)
+
+    hash_count, = struct.unpack_from(COUNT_FORMAT, data, offset)
+    offset += struct.calcsize(COUNT_FORMAT)
+    recorder.hashes = list(struct.unpack_from("<{}I".format(hash_count), data, offset))
+    return recorder
+
+
+class ReplayPlayer:
+    # Feeds recorded actions to GameStuff in place of pygame events and compares the state hash after every tick.
+    # desync_tick is the first tick whose hash differed (None while in sync).
+    def __init__(self, recording):
+        self._recording = recording
+        self._next_action = 0
+        self.desync_tick = None
+
+    def get_tick_count(self):
+        return len(self._recording.hashes)
+
+    def apply_actions(self, game_stuff):
+        actions = self._recording.actions
+        while self._next_action < len(actions) and actions[self._next_action][0] == game_stuff.ticks:
+            tick, action, arg_a, arg_b = actions[self._next_action]
+            game_stuff.apply_action(action, arg_a, arg_b)
+            self._next_action += 1
+
+    def end_tick(self, game_stuff):
+        if self.desync_tick is None and state_hash(game_stuff) != self._recording.hashes[game_stuff.ticks]:
+            self.desync_tick = game_stuff.ticks
+
+
+def play(path, stop_on_desync=True, profile_path=None):
+    # Headless, as fast as possible. Returns (player, ticks played, seconds)
+    recording = load(path)
+    Defaults.BATCH_UNITS = bool(recording.flags & FLAG_BATCH_UNITS)
+    Defaults.BATCH_PROJECTILES = bool(recording.flags & FLAG_BATCH_PROJECTILES)
+    Defaults.FLOW_FIELD = bool(recording.flags & FLAG_FLOW_FIELD)
+    game_stuff = GameState.GameStuff(headless=True, seed=recording.seed)
+    player = ReplayPlayer(recording)
+    game_stuff.replay_player = player
+    if profile_path is not None:
+        Defaults.PROFILE_DUMP_PATH = profile_path
+        game_stuff.enable_profiler()
+    game_stuff.init_cards()
+
+    start = time.perf_counter()
+    while game_stuff.ticks < player.get_tick_count():
+        game_stuff.game_tick()
+        if stop_on_desync and player.desync_tick is not None:
+            break
+    elapsed = time.perf_counter() - start
+    game_stuff.close_profiler()
+    return player, game_stuff.ticks, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a prototype_td replay headless and verify its state hashes")
+    parser.add_argument("replay")
+    parser.add_argument("--keep-going", action="store_true", help="don't stop at the first desync")
+    parser.add_argument("--profile", help="attach Profiler timers and write PROFILE.json / PROFILE.csv")
+    args = parser.parse_args(argv)
+
+    player, ticks, elapsed = play(args.replay, not args.keep_going, args.profile)
+    print("{}: {} ticks in {:.2f}s ({:.0f} ticks/s)".format(os.path.basename(args.replay), ticks, elapsed, ticks / elapsed if elapsed > 0 else 0.0))
+    if player.desync_tick is not None:
+        print("desync at tick {}".format(player.desync_tick))
+        return 1
+    print("in sync")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import argparse
+import json
+import sys
+import time
+
+import Defaults as Defaults
+import GameObjects as GameObjects
+import GameState as GameState
+import Invariants as Invariants
+import Towers as Towers
+
+from GameStates import RoundState
+
+TOWER_TYPES = {
+    "maze": Towers.MazeTower,
+    "stomp": Towers.StompTower,
+    "shoot": Towers.ShootTower,
+}
+
+
+def make_rounds(round_count, prep_seconds=None):
+    # First round_count rounds of the default schedule, optionally with a fixed prep time
+    rounds = GameState.get_default_rounds()[-round_count:]
+    if prep_seconds is not None:
+        for round_info in rounds:
+            round_info.prep_ticks = prep_seconds * 60
+    return rounds
+
+
+class HeadlessSimulation:
+    # Runs GameStuff's round / gameplay ticks as fast as possible, no display, fonts or event pump. Towers are placed
+    # from a scripted layout of (tower type, column, row) before the first round.
+    def __init__(self, layout=None, rounds=None, ignore_gold=True):
+        self.game_stuff = GameState.GameStuff(rounds=rounds, headless=True)
+        self.ticks = 0
+        self.elapsed = 0.0
+        self.subsystem_seconds = {"tick_round": 0.0}
+        self.peak_object_counts = {t: 0 for t in GameObjects.ObjectType}
+        self._round_count = len(self.game_stuff.rounds) + 1  # + current_round
+
+        for tower_name, col, row in layout or []:
+            self.place_tower(TOWER_TYPES[tower_name], col, row, ignore_gold)
+
+    def place_tower(self, tower_type, col, row, ignore_gold=True):
+        tile = self.game_stuff.grid.get_tile_by_index([col, row])
+        if tile is None or not self.game_stuff.grid.can_place_tower(tile):
+            print("warn: skipped " + tower_type.__name__ + " at " + str((col, row)))
+            return False
+        if ignore_gold:
+            self.game_stuff.player_info.gold += tower_type.COST
+        elif self.game_stuff.player_info.gold < tower_type.COST:
+            return False
+        self.game_stuff.create_tower(tower_type, tile)
+        return True
+
+    def is_finished(self):
+        game_stuff = self.game_stuff
+        return game_stuff.round_state == RoundState.POST and len(game_stuff.rounds) == 0
+
+    def tick(self):
+        game_stuff = self.game_stuff
+        game_stuff.pve_tick(self.subsystem_seconds)
+
+        for t, count in game_stuff.gom.get_object_counts().items():
+            if count > self.peak_object_counts[t]:
+                self.peak_object_counts[t] = count
+        if game_stuff.profiler is not None:
+            game_stuff.update_profiler_stats()
+        self.ticks += 1
+
+    def run(self, max_ticks=None):
+        start = time.perf_counter()
+        while not self.is_finished() and (max_ticks is None or self.ticks < max_ticks):
+            self.tick()
+        self.elapsed += time.perf_counter() - start
+        return self.get_report()
+
+    def get_rounds_completed(self):
+        game_stuff = self.game_stuff
+        rounds_completed = self._round_count - len(game_stuff.rounds) - 1
+        if game_stuff.round_state == RoundState.POST:
+            rounds_completed += 1
+        return rounds_completed
+
+    def get_report(self):
+        game_stuff = self.game_stuff
+        return {
+            "ticks": self.ticks,
+            "seconds": self.elapsed,
+            "ticks_per_second": self.ticks / self.elapsed if self.elapsed > 0 else 0.0,
+            "subsystem_seconds": dict(self.subsystem_seconds),
+            "peak_object_counts": {t.name.lower(): count for t, count in self.peak_object_counts.items() if count > 0},
+            "rounds_completed": self.get_rounds_completed(),
+            "round": game_stuff.current_round.round_number,
+            "health": game_stuff.player_info.health,
+            "gold": game_stuff.player_info.gold,
+            "invariant_violations": game_stuff.invariants.violation_count,
+            "object_pools": game_stuff.object_pools.get_stats(),
+        }
+
+
+def print_report(report):
+    print("ticks: {} in {:.2f}s ({:.0f} ticks/s)".format(report["ticks"], report["seconds"], report["ticks_per_second"]))
+    for name, seconds in sorted(report["subsystem_seconds"].items(), key=lambda x: -x[1]):
+        print("  {}: {:.3f}s ({:.1f} us/tick)".format(name, seconds, seconds / max(report["ticks"], 1) * 1e6))
+    print("peak objects: " + ", ".join("{}={}".format(k, v) for k, v in report["peak_object_counts"].items()))
+    print("rounds completed: {}, health: {}, gold: {}".format(report["rounds_completed"], report["health"], report["gold"]))
+    print("invariant violations: {}".format(report["invariant_violations"]))
+    for name, stats in report["object_pools"].items():
+        print("pool {}: {}".format(name, ", ".join("{}={}".format(k, v) for k, v in stats.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless simulation of prototype_td rounds")
+    parser.add_argument("--layout", help="json file with a list of [tower, column, row], tower is one of " + ", ".join(TOWER_TYPES))
+    parser.add_argument("--rounds", type=int, default=10, help="number of rounds of the default schedule to play")
+    parser.add_argument("--prep-seconds", type=int, default=0, help="prep time of every round")
+    parser.add_argument("--max-ticks", type=int, default=None)
+    parser.add_argument("--batch-units", action="store_true", help="use UnitEngine.UnitBatch")
+    parser.add_argument("--batch-projectiles", action="store_true", help="use ProjectileEngine.ProjectilePool")
+    parser.add_argument("--flow-field", action="store_true", help="route with PathFinding.FlowField")
+    parser.add_argument("--gc-freeze", action="store_true", help="gc.freeze() the grid after it is built")
+    parser.add_argument("--checks", choices=[level.value for level in Invariants.CheckLevel], default=Defaults.INVARIANT_CHECKS, help="invariant check level")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--profile", help="attach Profiler timers and write PROFILE.json / PROFILE.csv")
+    args = parser.parse_args(argv)
+
+    Defaults.BATCH_UNITS = args.batch_units
+    Defaults.BATCH_PROJECTILES = args.batch_projectiles
+    Defaults.INVARIANT_CHECKS = args.checks
+    Defaults.FLOW_FIELD = args.flow_field
+    Defaults.GC_FREEZE_STATIC_WORLD = args.gc_freeze
+
+    layout = []
+    if args.layout:
+        with open(args.layout) as f:
+            layout = json.load(f)
+
+    simulation = HeadlessSimulation(layout=layout, rounds=make_rounds(args.rounds, args.prep_seconds))
+    if args.profile:
+        Defaults.PROFILE_DUMP_PATH = args.profile
+        simulation.game_stuff.enable_profiler()
+    report = simulation.run(max_ticks=args.max_ticks)
+    simulation.game_stuff.close_profiler()
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,14 +18,20 @@ class TowerVersions(Enum):
 
 
 class BaseTower(GameObjects.GameObject):
+    __slots__ = ("_gom", "_projectile_pool", "READY_COLOR", "ATTACK_COLOR", "OTHER_COLOR", "_attack_damage", "_current_tick",
+                 "_attack_startup_ticks", "_attack_active_ticks", "_attack_end_ticks", "_reload_tick", "_reset_tick",
+                 "_target_units", "_visible_tiles", "_range_overlay", "_object_pools")
+
     def __init__(self, location=None, visible=False, gom=None):
         GameObjects.GameObject.__init__(self, location, visible)
         self._object_type = GameObjects.ObjectType.TOWER
         self._color = Colors.YELLOW
 
         self._gom = gom  # TODO: Passing in GOM is ugly.
+        self._projectile_pool = None
+        self._object_pools = None  # ObjectPools to take projectiles from, constructed directly when None
 
-        self._size = Defaults.DEFAULT_TOWER_SIZE
+        self.set_shape(self._shape, Defaults.DEFAULT_TOWER_SIZE)
 
         self.READY_COLOR = Colors.YELLOW
         self.ATTACK_COLOR = Colors.RED
@@ -41,14 +47,21 @@ class BaseTower(GameObjects.GameObject):
         self._reload_tick = 20
         self._reset_tick = self._reload_tick + self._attack_startup_ticks + self._attack_active_ticks + self._attack_end_ticks
 
-        self._target_units = []
+        self._target_units = {}  # units on _visible_tiles (dict as an ordered set), kept up to date by the grid
 
         self._visible_tiles = []
+        self._range_overlay = None  # (surface, location) from DrawUtils.create_range_overlay, see update_range_overlay
 
     def initialize(self):
         print("err initializing base tower")
         exit(-1)
 
+    def set_projectile_pool(self, projectile_pool):
+        self._projectile_pool = projectile_pool
+
+    def set_object_pools(self, object_pools):
+        self._object_pools = object_pools
+
     def ready_tick(self):
         if self.should_attack():
             self._current_tick += 1
@@ -77,15 +90,33 @@ class BaseTower(GameObjects.GameObject):
         else:
             self.attack_reload_tick()
 
-    def should_attack(self):
-        self._target_units = []
-        for tile in self._visible_tiles:
-            for unit in tile.get_units():
-                self._target_units.append(unit)
+    def set_visible_tiles(self, tiles):
+        self._visible_tiles = tiles
+        self._target_units = {}
+        self._tile.get_grid().watch_tiles(self, tiles)
+        self.update_range_overlay()
 
-        if len(self._target_units) > 0:
-            return True
-        return False
+    def create_range_overlay(self):
+        return None
+
+    def update_range_overlay(self):
+        # Only on place / move (set_visible_tiles) and upgrade, drawing just blits the result
+        self._range_overlay = self.create_range_overlay()
+
+    def get_sprites(self):
+        sprites = GameObjects.GameObject.get_sprites(self)
+        if self._range_overlay is not None and (self._hovered or Defaults.DEBUG_SHOW_ALL_RANGES):
+            sprites.append(self._range_overlay)
+        return sprites
+
+    def unit_entered_range(self, unit):
+        self._target_units[unit] = None
+
+    def unit_left_range(self, unit):
+        self._target_units.pop(unit, None)
+
+    def should_attack(self):
+        return len(self._target_units) > 0
 
     def get_active_tick_end_frame(self):
         return self._attack_startup_ticks + self._attack_active_ticks
@@ -109,6 +140,7 @@ class MazeTower(BaseTower):
     COST = 5
     UPGRADE_COST = 5
     COLOR = Colors.GRAY
+    __slots__ = ()
 
     def __init__(self, location=None, visible=False, gom=None):
         BaseTower.__init__(self, location=location, visible=visible, gom=gom)
@@ -125,6 +157,7 @@ class StompTower(BaseTower):
     COST = 20
     UPGRADE_COST = 20
     COLOR = Colors.YELLOW
+    __slots__ = ("reset_tick", "UPGRADE_TOWER_TYPE", "tower_type")
 
     def __init__(self, location=None, visible=False, gom=None):
         BaseTower.__init__(self, location=location, visible=visible, gom=gom)
@@ -132,43 +165,41 @@ class StompTower(BaseTower):
         self.UPGRADE_TOWER_TYPE = StompPlusTower
         self.tower_type = TowerVersions.BASE
 
-    def draw_object(self, screen):
-        DrawUtils.draw_shape(screen, self.get_location(), self.get_center_location(), self._shape, self._size, self._color)
-
-        if self._hovered:
-            min_x, min_y, max_x, max_y = 999999, 999999, 0, 0
-            for t in self._visible_tiles:
-                x, y = t.get_location()
-                min_x = min(x, min_x)
-                min_y = min(y, min_y)
-                max_x = max(x, max_x)
-                max_y = max(y, max_y)
-            max_x += self._visible_tiles[0].get_size()[0]
-            max_y += self._visible_tiles[0].get_size()[1]
-
-            center = ((min_x+max_x)/2, (min_y+max_y)/2)
-            DrawUtils.draw_shape(screen, (min_x, min_y), center, DrawUtils.Shapes.RECT, (max_x-min_x, max_y-min_y), Colors.RED, True)
+    def create_range_overlay(self):
+        # Bounding box of the visible tiles
+        min_x, min_y, max_x, max_y = 999999, 999999, 0, 0
+        for t in self._visible_tiles:
+            x, y = t.get_location()
+            min_x = min(x, min_x)
+            min_y = min(y, min_y)
+            max_x = max(x, max_x)
+            max_y = max(y, max_y)
+        max_x += self._visible_tiles[0].get_size()[0]
+        max_y += self._visible_tiles[0].get_size()[1]
+
+        center = ((min_x+max_x)/2, (min_y+max_y)/2)
+        return DrawUtils.create_range_overlay((min_x, min_y), center, DrawUtils.Shapes.RECT, (max_x-min_x, max_y-min_y), Colors.RED)
 
     def initialize(self):
-        self._visible_tiles = self._tile.get_neighbors()
+        self.set_visible_tiles(self._tile.get_neighbors())
 
     def attack_active_tick(self):
         self._color = self.ATTACK_COLOR
-        tiles = self._tile.get_neighbors()
-        for tile in tiles:
-            for unit in tile.get_units():
-                unit.take_damage(self._attack_damage)
+        for unit in list(self._target_units):
+            unit.take_damage(self._attack_damage)
 
     def upgrade_tower(self):
         if self.tower_type == TowerVersions.BASE:
             self.tower_type = TowerVersions.STD_1
-            self._size *= 1.5
+            self.set_shape(self._shape, self._size * 1.5)
             self._attack_damage *= 1.5
+            self.update_range_overlay()
 
 
 class StompPlusTower(StompTower):
     COST = 10
     COLOR = Colors.YELLOW
+    __slots__ = ()
 
     def __init__(self, location=None, visible=False, gom=None):
         BaseTower.__init__(self, location=location, visible=visible, gom=gom)
@@ -176,10 +207,8 @@ class StompPlusTower(StompTower):
 
     def attack_active_tick(self):
         self._color = self.ATTACK_COLOR
-        tiles = self._tile.get_neighbors()
-        for tile in tiles:
-            for unit in tile.get_units():
-                unit.take_damage(self._attack_damage)
+        for unit in list(self._target_units):
+            unit.take_damage(self._attack_damage)
 
     def upgrade_tower(self):
         print("already fully upgrade...")
@@ -189,6 +218,7 @@ class ShootTower(BaseTower):
     COST = 20
     UPGRADE_COST = math.inf
     COLOR = Colors.GREEN
+    __slots__ = ("_attack_range", "UPGRADE_TOWER_TYPE", "_tower_type", "_projectile_type", "_projectile_speed", "_projectile_damage")
 
     def __init__(self, location=None, visible=False, gom=None):
         BaseTower.__init__(self, location=location, visible=visible, gom=gom)
@@ -211,37 +241,54 @@ class ShootTower(BaseTower):
         self._projectile_speed = 20
         self._projectile_damage = 20
 
-    def draw_object(self, screen):
-        DrawUtils.draw_shape(screen, self.get_location(), self.get_center_location(), self._shape, self._size, self._color)
+    def get_attack_range(self):
+        return self._attack_range
 
-        if self._hovered:
-            DrawUtils.draw_shape(screen, None, self.get_center_location(), DrawUtils.Shapes.CIRCLE, self._attack_range, Colors.RED, True)
+    def create_range_overlay(self):
+        return DrawUtils.create_range_overlay(None, self.get_center_location(), DrawUtils.Shapes.CIRCLE, self._attack_range, Colors.RED)
 
     def initialize(self):
-        self._visible_tiles = self._tile.get_tiles_in_range(self._attack_range)
+        self.set_visible_tiles(self._tile.get_tiles_in_range(self._attack_range))
 
     def attack_active_tick(self):
         self._color = self.ATTACK_COLOR
 
-        proj = self._projectile_type(speed=self._projectile_speed, location=self._tile.get_center_location(), visible=True, tile=self._tile, damage=self._projectile_damage)
-        self._gom.add_game_object(proj)
-        proj.initialize()
+        if self._projectile_pool is not None:
+            proj = None
+            slot = self._projectile_pool.spawn(self._tile.get_center_location(), speed=self._projectile_speed, damage=self._projectile_damage)
+        else:
+            kwargs = dict(speed=self._projectile_speed, location=self._tile.get_center_location(), visible=True, tile=self._tile, damage=self._projectile_damage, destroy_event=self.projectile_destroyed)
+            if self._object_pools is None:
+                proj = self._projectile_type(**kwargs)
+            else:
+                proj = self._object_pools.acquire(self._projectile_type, **kwargs)
+            self._gom.add_game_object(proj)
+            proj.initialize()
 
         # Don't shoot if all targets have left range
         if len(self._target_units) == 0:
             return
 
-        unit_loc = self._target_units[0].get_center_location()
+        unit_loc = next(iter(self._target_units)).get_center_location()
         tile_loc = self._tile.get_center_location()
         # TODO: This mess is not how direction should be done....
         target_direction = [unit_loc[0] - tile_loc[0], unit_loc[1] - tile_loc[1]]
         scalar = max(math.fabs(target_direction[0]), math.fabs(target_direction[1]))
         if scalar > 1:
             target_direction = [target_direction[0]/scalar, target_direction[1]/scalar]
-        proj.set_direction(target_direction)
+        if proj is None:
+            self._projectile_pool.set_direction(slot, target_direction)
+        else:
+            proj.set_direction(target_direction)
+
+    def projectile_destroyed(self, proj):
+        self._gom.remove_game_object(proj)
+        if self._object_pools is not None:
+            self._object_pools.release(proj)
 
     def upgrade_tower(self):
         if self._tower_type == TowerVersions.BASE:
             self._tower_type = TowerVersions.STD_1
-            self._size *= 1.5
+            self.set_shape(self._shape, self._size * 1.5)
             self._attack_damage *= 1.5
+            self.update_range_overlay()
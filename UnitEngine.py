@@ -0,0 +1,238 @@
+import numpy as np
+
+import Defaults as Defaults
+import GameObjects as GameObjects
+import PathFinding as PathFinding
+import Units as Units
+
+
+class UnitBatch(GameObjects.GameObject):
+    # Structure of arrays for every BatchedUnit on a grid, one vectorized step per gameplay tick instead of a method
+    # call per unit. Positions are unit centers, slots of dead units are reused.
+    def __init__(self, grid, capacity=256):
+        GameObjects.GameObject.__init__(self)
+        self._object_type = GameObjects.ObjectType.BATCH
+        self._grid = grid
+
+        self._centers = np.zeros((capacity, 2), dtype=np.float64)
+        self._previous_centers = np.zeros((capacity, 2), dtype=np.float64)  # centers before the last gameplay tick
+        self._alpha = 1.0
+        self._directions = np.zeros((capacity, 2), dtype=np.float64)
+        self._speeds = np.zeros(capacity, dtype=np.float64)
+        self._healths = np.zeros(capacity, dtype=np.float64)
+        self._tile_ids = np.zeros(capacity, dtype=np.intp)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._units = [None] * capacity
+        self._free_slots = list(range(capacity - 1, -1, -1))
+
+    def get_unit_count(self):
+        return len(self._units) - len(self._free_slots)
+
+    def _grow(self):
+        capacity = len(self._units)
+        for name in ["_centers", "_previous_centers", "_directions", "_speeds", "_healths", "_tile_ids", "_active"]:
+            old = getattr(self, name)
+            new = np.zeros((capacity * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self._units += [None] * capacity
+        self._free_slots += list(range(capacity * 2 - 1, capacity - 1, -1))
+
+    def allocate(self, unit):
+        if len(self._free_slots) == 0:
+            self._grow()
+        slot = self._free_slots.pop()
+        self._units[slot] = unit
+        self._centers[slot] = np.nan  # no location until placed on a tile
+        self._previous_centers[slot] = np.nan
+        self._directions[slot] = (0.0, 1.0)  # Direction.DOWN
+        self._active[slot] = False
+        return slot
+
+    def release(self, slot):
+        self._active[slot] = False
+        self._units[slot] = None
+        self._free_slots.append(slot)
+
+    def is_tickable(self):
+        return True
+
+    def get_tick_type(self):
+        # Units move before projectiles resolve their hits, same as per Unit
+        return GameObjects.ObjectType.UNIT
+
+    def visual_tick(self, alpha=1.0):
+        self._alpha = alpha
+
+    def get_visual_center(self, slot):
+        # Interpolated like GameObject.visual_tick, None before the unit's first gameplay tick
+        px, py = self._previous_centers[slot]
+        x, y = self._centers[slot]
+        if px != px or x != x:  # nan
+            return None
+        return px + (x - px) * self._alpha, py + (y - py) * self._alpha
+
+    def gameplay_tick(self):
+        live = np.flatnonzero(self._active)
+        if live.size == 0:
+            return
+        self._previous_centers[live] = self._centers[live]
+
+        tile_centers = self._grid.get_tile_centers()
+        next_nodes = self._grid.get_next_node_array()
+
+        centers = self._centers[live]
+        directions = self._directions[live]
+        speeds = self._speeds[live, None]
+        tiles = self._tile_ids[live]
+        tile_centers_cur = tile_centers[tiles]
+
+        # Move if still moving towards center of current tile
+        new_centers = centers + directions * speeds
+        cur_dist = ((centers - tile_centers_cur) ** 2).sum(axis=1)
+        towards_center = ((new_centers - tile_centers_cur) ** 2).sum(axis=1) <= cur_dist
+
+        # Past the center, turn towards the next tile of the shared exit field
+        next_tiles = next_nodes[tiles]
+        has_next = next_tiles != PathFinding.NO_NODE
+        turning = ~towards_center & has_next
+        arrived = ~towards_center & ~has_next & self._grid.get_exit_mask()[tiles]
+
+        tile_centers_next = tile_centers[np.where(has_next, next_tiles, tiles)]
+        directions = np.where(turning[:, None], np.sign(tile_centers_next - tile_centers_cur), directions)
+        new_centers = centers + directions * speeds
+        centers = np.where((towards_center | turning)[:, None], new_centers, centers)
+
+        # check if swapped tiles
+        swapped = turning & (((centers - tile_centers_next) ** 2).sum(axis=1) <= ((centers - tile_centers_cur) ** 2).sum(axis=1))
+
+        self._centers[live] = centers
+        self._directions[live] = directions
+
+        # Tile changes and the end tile go through the normal object events (towers in range, GameStuff, etc)
+        for slot in live[arrived].tolist():
+            self._units[slot].trigger_end_tile()
+        for slot, next_tile in zip(live[swapped].tolist(), next_tiles[swapped].tolist()):
+            unit = self._units[slot]
+            if unit is not None and self._active[slot]:
+                unit.move_to_tile(self._grid.get_tile_by_id(next_tile))
+
+
+class BatchedUnit(Units.Unit):
+    # Thin view onto a UnitBatch slot, behaves like a Unit for towers, projectiles and drawing
+    __slots__ = ("_batch", "_slot", "_released_state")
+
+    def __init__(self, batch, health=100, speed=10.0, location=None, visible=False, death_event=None, end_tile_event=None):
+        self._batch = batch
+        self._slot = batch.allocate(self)
+        self._released_state = {}
+        self._size = Defaults.DEFAULT_OBJ_SIZE
+        Units.Unit.__init__(self, health=health, speed=speed, location=location, visible=visible, death_event=death_event, end_tile_event=end_tile_event)
+
+    def reset(self, batch, health=100, speed=10.0, location=None, visible=False, death_event=None, end_tile_event=None):
+        self._batch = batch
+        self._slot = batch.allocate(self)
+        self._released_state = {}
+        Units.Unit.reset(self, health=health, speed=speed, location=location, visible=visible, death_event=death_event, end_tile_event=end_tile_event)
+
+    def _get_location(self):
+        if self._slot is None:
+            return self._released_state["location"]
+        x, y = self._batch._centers[self._slot]
+        if x != x:  # nan
+            return None
+        return x - self._size/2, y - self._size/2
+
+    def _set_location(self, location):
+        if self._slot is None:
+            self._released_state["location"] = location
+        elif location is None:
+            self._batch._centers[self._slot] = np.nan
+        else:
+            self._batch._centers[self._slot] = (location[0] + self._size/2, location[1] + self._size/2)
+
+    def _get_center(self):
+        if self._slot is None:
+            location = self._released_state["location"]
+            return None if location is None else (location[0] + self._size/2, location[1] + self._size/2)
+        x, y = self._batch._centers[self._slot]
+        if x != x:  # nan
+            return None
+        return x, y
+
+    def _get_health(self):
+        if self._slot is None:
+            return self._released_state["health"]
+        return self._batch._healths[self._slot]
+
+    def _set_health(self, health):
+        if self._slot is None:
+            self._released_state["health"] = health
+        else:
+            self._batch._healths[self._slot] = health
+
+    def _get_move_speed(self):
+        return self._batch._speeds[self._slot]
+
+    def _set_move_speed(self, speed):
+        self._batch._speeds[self._slot] = speed
+
+    def _get_active(self):
+        return self._slot is not None and self._batch._active[self._slot]
+
+    def _set_active(self, active):
+        if self._slot is not None:
+            self._batch._active[self._slot] = active
+
+    _location = property(_get_location, _set_location)
+    _health = property(_get_health, _set_health)
+    _move_speed = property(_get_move_speed, _set_move_speed)
+    _active = property(_get_active, _set_active)
+
+    def _release(self):
+        if self._slot is None:
+            return
+        self._released_state = {"location": self._get_location(), "health": self._get_health()}
+        self._batch.release(self._slot)
+        self._slot = None
+
+    def get_center_location(self):
+        # Straight from the batch instead of through _location
+        center = self._get_center()
+        if center is None and self._tile is not None:
+            return self._tile.get_center_location()
+        return center
+
+    def get_visual_center_location(self):
+        center = None
+        if self._slot is not None:
+            center = self._batch.get_visual_center(self._slot)
+        if center is None:
+            return self.get_center_location()
+        return center
+
+    def get_visible_location(self):
+        center = self.get_visual_center_location()
+        if center is None:
+            return None
+        return center[0] - self._size/2, center[1] - self._size/2
+
+    def set_tile(self, tile):
+        Units.Unit.set_tile(self, tile)
+        self._batch._tile_ids[self._slot] = tile.get_node_id()
+
+    def move_to_tile(self, tile):
+        self._tile.remove_object(self)
+        tile.add_object(self)
+
+    def trigger_death(self):
+        Units.Unit.trigger_death(self)
+        self._release()
+
+    def trigger_end_tile(self):
+        self._active = False
+        self._end_tile_event(self, self._tile)
+        self._release()
+
+    def is_tickable(self):
+        return False
@@ -7,32 +7,38 @@ from Grid import Direction
 
 
 class Unit(GameObjects.GameObject):
+    __slots__ = ("_end_tile_event", "_death_event", "_direction", "_gold_value", "_move_speed", "_health", "_active")
+
     def __init__(self, health=100, speed=10.0, location=None, visible=False, death_event=None, end_tile_event=None):
         GameObjects.GameObject.__init__(self, location, visible)
-        self._end_tile_event = end_tile_event  # TODO: Should be an event triggered from the end tile itself...?
-        self._death_event = death_event
-        self._direction = Direction.DOWN
-        self._tile_queue = []
         self._object_type = GameObjects.ObjectType.UNIT
         self._color = Colors.BLUE
 
         self._gold_value = 1
 
+        Unit.reset(self, health, speed, location, visible, death_event, end_tile_event)
+
+    def reset(self, health=100, speed=10.0, location=None, visible=False, death_event=None, end_tile_event=None):
+        GameObjects.GameObject.reset(self, location, visible)
+        self._end_tile_event = end_tile_event  # TODO: Should be an event triggered from the end tile itself...?
+        self._death_event = death_event
+        self._direction = Direction.DOWN
+
         self._move_speed = min(speed, Defaults.DEFAULT_UNIT_SIZE)  # TODO: Moving faster than tile size not tested/supported.
 
         self._health = health
         self._active = False
 
-        self._prev_tile = None
-
     def initialize(self):
-        self.find_path()
         self._active = True
 
     def trigger_death(self):
         self._active = False
         self._death_event(self, self._tile)
 
+    def get_health(self):
+        return self._health
+
     def get_gold_value(self):
         return self._gold_value
 
@@ -55,43 +61,35 @@ class Unit(GameObjects.GameObject):
         else:
             new_location = None
 
-        return new_location[0] - self._size/2, new_location[1] - self._size/2
-
-    def find_path(self):
-        self._tile_queue.clear()
-        self._tile_queue = self._tile.get_path_to_exit_tile()
-
-        if self._tile_queue is None:
-            self._tile_queue = []
-
-        if len(self._tile_queue) > 0:
-            self._tile_queue.pop()
+        return new_location
 
     def get_next_tile(self):
-        if len(self._tile_queue) == 0:
-            return None
-        return self._tile_queue[-1]
+        # Read from the grid's shared distance field every time, so units re-route as soon as towers are placed
+        return self._tile.get_next_tile_to_exit()
 
     def gameplay_tick(self):
         if not self._active or self._location is None or self._tile is None or self._direction is Direction.UNKNOWN:
             return
 
-        # Sample potential location
+        # Sample potential center
         new_location = self.sample_direction(self._direction)
 
         # Move if still moving towards center of current tile
-        center_loc = (new_location[0]+self._size/2, new_location[1]+self._size/2)
-        if Math.sq_dist(center_loc, self._tile.get_center_location()) <= Math.sq_dist(self.get_center_location(), self._tile.get_center_location()):
-            self.set_location(new_location)
+        tile_center = self._tile.get_center_location()
+        if Math.sq_dist(new_location, tile_center) <= Math.sq_dist(self.get_center_location(), tile_center):
+            self.set_center_location(new_location)
             return
 
-        # Hit end tile...
-        if len(self._tile_queue) == 0:
-            self._active = False
-            self._end_tile_event(self, self._tile)
+        next_tile = self.get_next_tile()
+        if next_tile is None:
+            # Hit end tile...
+            if self._tile.is_exit_tile():
+                self._active = False
+                self._end_tile_event(self, self._tile)
+            # Otherwise the exit can't be reached from here (placement keeps every unit's tile connected, so only
+            # when the grid has no path at all), wait until a path opens up
             return
 
-        next_tile = self.get_next_tile()
         if self._tile.get_right() == next_tile:
             next_direction = Direction.RIGHT
         elif self._tile.get_left() == next_tile:
@@ -105,16 +103,16 @@ class Unit(GameObjects.GameObject):
             self._direction = next_direction
             new_location = self.sample_direction(self._direction)
 
-        self.set_location(new_location)
+        self.set_center_location(new_location)
 
         # check if swapped tiles
-        cur_tile_dist = Math.sq_dist(self.get_center_location(), self._tile.get_center_location())
-        next_tile_dist = Math.sq_dist(self.get_center_location(), next_tile.get_center_location())
+        cur_tile_dist = Math.sq_dist(new_location, tile_center)
+        next_tile_dist = Math.sq_dist(new_location, next_tile.get_center_location())
 
         if next_tile_dist <= cur_tile_dist:
             # TODO: move x or y to line up with center of tile (which one depending on direction)
             self._tile.remove_object(self)
-            self._tile = self._tile_queue.pop()
+            self._tile = next_tile
             self._tile.add_object(self)
 
     def is_tickable(self):
@@ -123,4 +121,4 @@ class Unit(GameObjects.GameObject):
     def set_tile(self, tile):
         GameObjects.GameObject.set_tile(self, tile)
         if self._location is None:
-            self._location = (tile.get_center_location()[0]-self._size/2, tile.get_center_location()[1]-self._size/2)
+            self.set_center_location(tile.get_center_location())
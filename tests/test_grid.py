@@ -0,0 +1,154 @@
+import random
+
+import numpy as np
+import pytest
+
+import DrawUtils as DrawUtils
+import Grid as Grid
+import MathUtils as Math
+import PathFinding as PathFinding
+import Towers as Towers
+
+
+def make_grid(cols=16, rows=9, tile_size=50):
+    return Grid.Grid((0, 0), (cols * tile_size, rows * tile_size), rows=rows, cols=cols)
+
+
+def scan_tiles_in_range(grid, tile, distance):
+    # Brute force geometry, every tile center within distance of the tile center
+    center = tile.get_center_location()
+    return [t for t in grid.get_tiles_flatten_list() if Math.distance(t.get_center_location(), center) <= distance]
+
+
+@pytest.mark.parametrize("dimensions, size, distance", [
+    ((16, 9), (1008, 648), Towers.ShootTower(location=(0, 0)).get_attack_range()),
+    ((16, 9), (800, 450), 150),
+    ((16, 9), (1600, 900), 100),
+    ((64, 36), (3200, 1800), 275.5),
+])
+def test_range_stencil_matches_brute_force(dimensions, size, distance):
+    cols, rows = dimensions
+    grid = Grid.Grid((17, 9), size, rows=rows, cols=cols)
+    for tile in grid.get_tiles_flatten_list():
+        assert tile.get_tiles_in_range(distance) == scan_tiles_in_range(grid, tile, distance), tile.get_grid_loc()
+
+
+def scan_closest_tile(grid, loc, b_within_grid=True):
+    # Grid.get_closest_tile before the arithmetic lookup: closest tile center, first tile wins ties
+    x, y = loc
+    if b_within_grid and not grid.in_bounds(loc):
+        return None
+    closest_tile = None
+    lowest_dist = None
+    for tile in grid.get_tiles_flatten_list():
+        center = tile.get_center_location()
+        dist = (center[0]-x)*(center[0]-x) + (center[1]-y)*(center[1]-y)
+        if lowest_dist is None or dist < lowest_dist:
+            closest_tile = tile
+            lowest_dist = dist
+    return closest_tile
+
+
+def test_closest_tile_matches_scan():
+    # The game's grid geometry (GameStuff places it with VisualManager, tile sizes like 62.99999999999999 round
+    # borders). Every integer pixel along each row and column of tile centers, the tile borders and random points,
+    # inside and outside of the grid.
+    vm = DrawUtils.VisualManager()
+    grid = Grid.Grid(vm.get_location(.2, .1), vm.get_size(.7, .8))
+    rows, cols = grid.get_dimensions()
+    (x1, y1), (x2, y2) = grid.get_grid_bounds()
+    width, height = vm.get_size(1, 1)
+    rng = random.Random(0)
+    centers = [t.get_center_location() for t in grid.get_tiles_flatten_list()]
+    xs = sorted({c[0] for c in centers})
+    ys = sorted({c[1] for c in centers})
+    points = [(x, y) for x in range(-1, int(width) + 2) for y in ys[:2]] + [(x, y) for y in range(-1, int(height) + 2) for x in xs[:2]]
+    points += [(x1 + (x2 - x1) * i / cols, y) for i in range(cols + 1) for y in ys[:2]]
+    points += [(x, y1 + (y2 - y1) * j / rows) for j in range(rows + 1) for x in xs[:2]]
+    points += [(rng.uniform(-10, width + 10), rng.uniform(-10, height + 10)) for _ in range(2000)]
+
+    for loc in points:
+        for b_within_grid in (True, False):
+            assert grid.get_closest_tile(loc, b_within_grid) is scan_closest_tile(grid, loc, b_within_grid), (loc, b_within_grid)
+    node_ids = grid.get_node_ids_containing(np.array(points, dtype=np.float64)).tolist()
+    assert node_ids == [grid.get_tile_containing(loc).get_node_id() for loc in points]
+
+
+def test_shortest_path_is_shared_until_paths_change():
+    grid = make_grid()
+    enter_id = grid.get_enter_tile().get_node_id()
+    exit_id = grid.get_exit_tile().get_node_id()
+    tiles = grid.get_tiles_flatten_list()
+    path = grid.get_shortest_path()
+    assert grid.get_shortest_path() is path
+
+    _, next_nodes = PathFinding.distance_field(grid.get_neighbor_ids(), grid.get_blocked_nodes(), [exit_id])
+    assert list(path) == [tiles[n] for n in PathFinding.follow_next_nodes(next_nodes, enter_id, exit_id)]
+    assert path.get_step(0) is grid.get_enter_tile() and path.get_step(len(path) - 1) is grid.get_exit_tile()
+
+    path.get_step(len(path) // 2).add_object(Towers.MazeTower())
+    assert path.is_stale() and grid.get_shortest_path() is not path and not grid.get_shortest_path().is_stale()
+
+
+def rebuilt_exit_distances(grid):
+    exit_ids = [t.get_node_id() for t in grid.get_exit_tiles()]
+    return PathFinding.weighted_distance_field(grid.get_neighbor_ids(), grid.get_blocked_nodes(), grid.get_tile_costs(), exit_ids)[0]
+
+
+def test_weighted_exit_field_after_cost_change_matches_rebuild():
+    rng = random.Random(25)
+    grid = make_grid()
+    tiles = grid.get_tiles_flatten_list()
+    for tile in rng.sample(tiles, 40):
+        grid.set_tile_cost(tile, rng.randint(2, 5))
+    towers = {}
+    for _ in range(60):
+        tile = rng.choice(tiles)
+        if tile in towers:
+            tile.remove_object(towers.pop(tile))
+        elif grid.can_place_tower(tile):
+            towers[tile] = Towers.MazeTower()
+            tile.add_object(towers[tile])
+        else:
+            continue
+        assert [grid.get_distance_to_exit(t) for t in tiles] == rebuilt_exit_distances(grid)
+
+
+def test_slow_tile_is_routed_around():
+    grid = make_grid()
+    unweighted = list(grid.get_next_node_array())
+    path = grid.get_shortest_path()
+    slow_tile = path.get_step(len(path) // 2)
+
+    grid.set_tile_cost(slow_tile, 50)
+    assert slow_tile not in grid.get_shortest_path() and path.is_stale()
+    grid.set_tile_cost(slow_tile, 1)
+    assert list(grid.get_next_node_array()) == unweighted
+
+    # No path from a tile to itself, whether it is answered by the exit field or by A*
+    assert grid.get_shortest_path(grid.get_exit_tile(), grid.get_exit_tile()) is None
+    assert grid.get_shortest_path(slow_tile, slow_tile) is None
+
+
+def test_whole_float_cost_is_stored_as_int():
+    grid = make_grid()
+    tile = grid.get_shortest_path().get_step(4)
+    grid.set_tile_cost(tile, 50.0)
+    assert grid.get_tile_cost(tile) == 50 and type(grid.get_tile_cost(tile)) is int
+    assert tile not in grid.get_shortest_path()
+
+
+@pytest.mark.parametrize("cost", [2.5, 0, -1, 0x10000])
+def test_rejected_cost_leaves_grid_unchanged(cost):
+    grid = make_grid()
+    tile = grid.get_shortest_path().get_step(4)
+    grid.set_tile_cost(grid.get_tile_by_index([3, 3]), 7)
+    costs = list(grid.get_tile_costs())
+    next_nodes = list(grid.get_next_node_array())
+    version = grid.get_path_version()
+
+    with pytest.raises(ValueError):
+        grid.set_tile_cost(tile, cost)
+    assert list(grid.get_tile_costs()) == costs
+    assert list(grid.get_next_node_array()) == next_nodes
+    assert grid.get_path_version() == version
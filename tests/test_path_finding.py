@@ -0,0 +1,180 @@
+import random
+
+import pytest
+
+import Grid as Grid
+import MathUtils as Math
+import PathFinding as PathFinding
+import Towers as Towers
+
+
+def grid_neighbor_ids(cols, rows):
+    # Same layout as Grid, node id = col * rows + row with 4 neighbors
+    neighbor_ids = []
+    for i in range(cols):
+        for j in range(rows):
+            neighbors = []
+            for di, dj in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                if 0 <= i + di < cols and 0 <= j + dj < rows:
+                    neighbors.append((i + di) * rows + j + dj)
+            neighbor_ids.append(tuple(neighbors))
+    return neighbor_ids
+
+
+def reaches(neighbor_ids, blocked, sources, target):
+    distances, _ = PathFinding.multi_source_shortest_paths(neighbor_ids, blocked, [target])
+    return all(distances[source] != PathFinding.UNREACHABLE for source in sources)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_bfs_matches_pseudo_dijkstra(seed):
+    # The original pseudo_dijkstra is the reference for distances, on random 25% mazes
+    rng = random.Random(seed)
+    grid = Grid.Grid((0, 0), (800, 450), rows=9, cols=16)
+    tiles = grid.get_tiles_flatten_list()
+    if seed > 0:
+        for tile in rng.sample(tiles[1:], len(tiles) // 4):
+            tile.add_object(Towers.MazeTower())
+    source = grid.get_enter_tile()
+
+    distances, _ = PathFinding.multi_source_shortest_paths(grid.get_neighbor_ids(), grid.get_blocked_nodes(), [source.get_node_id()])
+    reference_distances, _, _ = Math.pseudo_dijkstra(tiles, source)
+    for tile in tiles:
+        distance = reference_distances.get(tile)
+        assert distances[tile.get_node_id()] == (PathFinding.UNREACHABLE if distance is None else distance)
+
+
+def test_separating_nodes_matches_blocking_each_node():
+    rng = random.Random(4)
+    cols, rows = 9, 7
+    neighbor_ids = grid_neighbor_ids(cols, rows)
+    node_count = cols * rows
+    for _ in range(200):
+        blocked = bytearray(1 if rng.random() < 0.3 else 0 for _ in range(node_count))
+        target = rng.randrange(node_count)
+        sources = rng.sample(range(node_count), rng.randint(1, 4))
+        for node in sources + [target]:
+            blocked[node] = 0
+        separating = PathFinding.separating_nodes(neighbor_ids, blocked, sources, target)
+
+        if not reaches(neighbor_ids, blocked, sources, target):
+            assert separating == bytearray(b"\x01") * node_count
+            continue
+        for node in range(node_count):
+            if blocked[node]:
+                continue
+            if node in sources or node == target:
+                assert separating[node]
+                continue
+            blocked[node] = 1
+            assert separating[node] == (not reaches(neighbor_ids, blocked, sources, target))
+            blocked[node] = 0
+
+
+def test_separating_nodes_with_virtual_target():
+    # Two exits, blocking one exit's only approach is fine while the other is open
+    neighbor_ids = grid_neighbor_ids(3, 1)
+    neighbor_ids, blocked, virtual = PathFinding.add_virtual_target(neighbor_ids, bytearray(3), [0, 2])
+    separating = PathFinding.separating_nodes(neighbor_ids, blocked, [1], virtual)
+    assert list(separating[:-1]) == [0, 1, 0]
+
+
+def random_maze(rng, cols, rows, keep_open):
+    # 25% blocked, keep_open nodes and their neighbors stay open
+    neighbor_ids = grid_neighbor_ids(cols, rows)
+    blocked = bytearray(1 if rng.random() < 0.25 else 0 for _ in range(cols * rows))
+    for node in keep_open:
+        for n in (node,) + neighbor_ids[node]:
+            blocked[n] = 0
+    return neighbor_ids, blocked
+
+
+def test_weighted_field_repair_matches_rebuild():
+    # Blocking / unblocking one node at a time repairs the weighted field in place, it must stay what a rebuild gives
+    rng = random.Random(25)
+    cols, rows = 8, 6
+    node_count = cols * rows
+    for _ in range(300):
+        target = rng.randrange(node_count)
+        neighbor_ids, blocked = random_maze(rng, cols, rows, [target])
+        costs = [rng.randint(1, 5) for _ in range(node_count)]
+        field = PathFinding.DistanceField(neighbor_ids, blocked, [target], costs)
+        for node in [rng.choice([n for n in range(node_count) if n != target]) for _ in range(60)]:
+            blocked[node] ^= 1
+            field.set_blocked(node, blocked[node])
+            assert field.distances == PathFinding.weighted_distance_field(neighbor_ids, blocked, costs, [target])[0]
+        for node, distance in enumerate(field.distances):
+            if distance > 0:
+                next_node = field.next_nodes[node]
+                assert not blocked[next_node] and distance == field.distances[next_node] + costs[next_node]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_a_star_cost_matches_weighted_field(seed):
+    rng = random.Random(seed)
+    cols, rows = 16, 9
+    node_count = cols * rows
+    target = node_count - 1
+    neighbor_ids, blocked = random_maze(rng, cols, rows, [0, target])
+    unit_costs = [1] * node_count
+    costs = [rng.randint(1, 5) for _ in range(node_count)]
+    assert PathFinding.weighted_distance_field(neighbor_ids, blocked, unit_costs, [target])[0] == PathFinding.distance_field(neighbor_ids, blocked, [target])[0]
+
+    for node_costs in (unit_costs, costs):
+        distances, _ = PathFinding.weighted_distance_field(neighbor_ids, blocked, node_costs, [target])
+        for source in range(node_count):
+            if blocked[source]:
+                continue
+            path, cost, _ = PathFinding.a_star(neighbor_ids, blocked, node_costs, source, target, rows, min(node_costs))
+            assert cost == distances[source]
+            assert (path is None) == (cost == PathFinding.UNREACHABLE or source == target)
+            if path is not None:
+                assert path[0] == target and path[-1] == source
+                assert all(u in neighbor_ids[v] and not blocked[u] for u, v in zip(path, path[1:]))
+                assert sum(node_costs[n] for n in path[:-1]) == cost
+
+
+def serpentine_blocked(cols, rows):
+    # Every other column is a wall with a gap alternating between the bottom and top row, the longest path a grid allows
+    blocked = bytearray(cols * rows)
+    for col in range(1, cols - 1, 2):
+        gap = rows - 1 if col % 4 == 1 else 0
+        for row in range(rows):
+            if row != gap:
+                blocked[col * rows + row] = 1
+    return blocked
+
+
+@pytest.mark.parametrize("cols, rows", [(16, 9), (64, 36)])
+@pytest.mark.parametrize("maze", ["random", "serpentine"])
+def test_multi_exit_fields_match_nearest_exit(cols, rows, maze):
+    # 4 exits, distance_field and flow_field against the minimum of one field per exit, then the DistanceField repair
+    # against a rebuild while towers are placed and removed
+    rng = random.Random(24)
+    neighbor_ids = grid_neighbor_ids(cols, rows)
+    targets = [(cols - 1) * rows + rows - 1, (cols - 1) * rows, rows - 1, (cols // 2) * rows + rows // 2]
+    if maze == "random":
+        blocked = bytearray(1 if rng.random() < 0.25 else 0 for _ in range(cols * rows))
+    else:
+        blocked = serpentine_blocked(cols, rows)
+    for target in targets:
+        blocked[target] = 0
+
+    distances, next_nodes = PathFinding.distance_field(neighbor_ids, blocked, targets)
+    flow_distances, flow_next_nodes = PathFinding.flow_field(neighbor_ids, blocked, cols, rows, targets)
+    assert flow_distances.tolist() == distances
+    reference = [PathFinding.distance_field(neighbor_ids, blocked, [target])[0] for target in targets]
+    for node, distance in enumerate(distances):
+        reachable = [d[node] for d in reference if d[node] != PathFinding.UNREACHABLE]
+        assert distance == (min(reachable) if reachable else PathFinding.UNREACHABLE)
+        if distance > 0:
+            for field_next_nodes in (next_nodes, flow_next_nodes):
+                assert field_next_nodes[node] in neighbor_ids[node] and distances[field_next_nodes[node]] == distance - 1
+
+    field = PathFinding.DistanceField(neighbor_ids, blocked, targets)
+    open_nodes = [n for n in range(cols * rows) if not blocked[n] and n not in targets]
+    nodes = rng.sample(open_nodes, min(100, len(open_nodes)))
+    for node in nodes + nodes:
+        blocked[node] ^= 1
+        field.set_blocked(node, blocked[node])
+        assert field.distances == PathFinding.distance_field(neighbor_ids, blocked, targets)[0]
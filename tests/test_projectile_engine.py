@@ -0,0 +1,33 @@
+import math
+
+import Grid as Grid
+import ProjectileEngine as ProjectileEngine
+
+
+def make_pool():
+    grid = Grid.Grid((0, 0), (400, 400), rows=8, cols=8)
+    return ProjectileEngine.ProjectilePool(grid)
+
+
+def test_spawned_slot_moves_from_the_next_tick():
+    pool = make_pool()
+    pool.spawn((100, 100), speed=10, direction=(1, 0))
+    start = pool.get_centers()[0].tolist()
+
+    pool.gameplay_tick()
+    assert pool.get_centers()[0].tolist() == start
+
+    pool.gameplay_tick()
+    assert pool.get_centers()[0].tolist() == [start[0] + 10, start[1]]
+
+
+def test_zero_direction_keeps_heading():
+    pool = make_pool()
+    slot = pool.spawn((100, 100), speed=10, direction=(0, 0))
+    pool.set_direction(slot, (0, 0))
+    pool.gameplay_tick()
+    pool.gameplay_tick()
+
+    x, y = pool.get_centers()[0].tolist()
+    assert not math.isnan(x) and not math.isnan(y)
+    assert (x, y) == (102.5, 112.5)
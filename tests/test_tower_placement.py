@@ -0,0 +1,34 @@
+import pytest
+
+import Defaults as Defaults
+import GameObjects as GameObjects
+import Simulation as Simulation
+import Towers as Towers
+
+
+def tick_until_unit_on(sim, grid_loc):
+    for _ in range(1000):
+        sim.tick()
+        for unit in sim.game_stuff.gom.get_objects_of_type(GameObjects.ObjectType.UNIT):
+            if tuple(unit.debug_get_tile().get_grid_loc()) == grid_loc:
+                return unit
+    raise AssertionError("no unit reached " + str(grid_loc))
+
+
+@pytest.mark.parametrize("batch_units", [False, True])
+def test_towers_cannot_wall_in_a_unit(monkeypatch, batch_units):
+    # Units walk down column 0 from the enter tile at (0, 0), walling one in mid round used to soft lock the round
+    monkeypatch.setattr(Defaults, "BATCH_UNITS", batch_units)
+    sim = Simulation.HeadlessSimulation(rounds=Simulation.make_rounds(1, 0))
+    grid = sim.game_stuff.grid
+    unit = tick_until_unit_on(sim, (0, 3))
+
+    assert not grid.can_place_tower(unit.debug_get_tile())
+    assert sim.place_tower(Towers.MazeTower, 1, 3)
+    assert sim.place_tower(Towers.MazeTower, 0, 2)
+    assert not grid.can_place_tower(grid.get_tile_by_index([0, 4]))
+    assert not sim.place_tower(Towers.MazeTower, 0, 4)
+
+    sim.run(max_ticks=20000)
+    assert sim.is_finished()
+    assert sim.game_stuff.current_round.units_remaining == 0